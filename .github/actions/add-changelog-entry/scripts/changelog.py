@@ -1,8 +1,206 @@
 import argparse
+import hashlib
+import json
 import sys
 from datetime import datetime
 import os
 
+from changelog_model import DATE_SECTION_PATTERN, PR_LINE_PATTERN, Changelog, Entry
+
+
+CHANGELOG_TITLE: str = "# Changelog"
+
+
+def build_pr_index(file_path: str, repository: str) -> set[int]:
+    """
+    Collect numbers of all PRs of the repository listed in the changelog.
+
+    Args:
+        file_path (str): The path to the changelog file.
+        repository (str): The GitHub repository in the format 'owner/repo'.
+
+    Returns:
+        set[int]: PR numbers.
+    """
+    pr_numbers: set[int] = set()
+    with open(file_path, "r") as file:
+        for line in file:
+            match = PR_LINE_PATTERN.match(line)
+            if match and match.group(1) == repository:
+                pr_numbers.add(int(match.group(2)))
+    return pr_numbers
+
+
+# Bytes of the start and the end of the changelog hashed to validate the PR index
+INDEX_CHECK_BYTES: int = 1 << 16
+
+
+def changelog_fingerprint(file_path: str) -> dict:
+    """
+    Compute a fingerprint of the changelog, which the PR index is validated with.
+
+    Only the size of the file and the hash of its first and last `INDEX_CHECK_BYTES`
+    bytes are used, so the whole file is not read. New entries and manual edits are
+    made near the top of the file, and any added or removed line changes the size.
+    Unlike the modification time, the fingerprint doesn't change with every checkout.
+
+    Args:
+        file_path (str): The path to the changelog file.
+
+    Returns:
+        dict: 'size' and 'sha256' of the file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        size: int = os.fstat(file.fileno()).st_size
+        digest.update(file.read(INDEX_CHECK_BYTES))
+        if size > INDEX_CHECK_BYTES:
+            file.seek(max(size - INDEX_CHECK_BYTES, INDEX_CHECK_BYTES))
+            digest.update(file.read())
+    return {"size": size, "sha256": digest.hexdigest()}
+
+
+def load_pr_index(index_path: str, file_path: str, repository: str) -> set[int]:
+    """
+    Load the index of PR numbers of the repository listed in the changelog.
+
+    The index stores the fingerprint of the changelog it was built for (see
+    `changelog_fingerprint`). If the changelog was changed without updating the
+    index (e.g. manually), the index is rebuilt.
+
+    Args:
+        index_path (str): The path to the index file.
+        file_path (str): The path to the changelog file.
+        repository (str): The GitHub repository in the format 'owner/repo'.
+
+    Returns:
+        set[int]: PR numbers.
+    """
+    if os.path.exists(index_path):
+        with open(index_path, "r") as file:
+            index: dict = json.load(file)
+        fingerprint: dict = changelog_fingerprint(file_path)
+        if index.get("repository") == repository and all(
+            index.get(key) == value for key, value in fingerprint.items()
+        ):
+            return set(index["pr_numbers"])
+    return build_pr_index(file_path, repository)
+
+
+def save_pr_index(
+    index_path: str, file_path: str, repository: str, pr_numbers: set[int]
+) -> None:
+    """
+    Save the index of PR numbers of the repository listed in the changelog.
+
+    Args:
+        index_path (str): The path to the index file.
+        file_path (str): The path to the changelog file.
+        repository (str): The GitHub repository in the format 'owner/repo'.
+        pr_numbers (set[int]): PR numbers.
+    """
+    index: dict = {
+        "repository": repository,
+        **changelog_fingerprint(file_path),
+        "pr_numbers": sorted(pr_numbers),
+    }
+    with open(index_path, "w") as file:
+        json.dump(index, file)
+        file.write("\n")
+
+
+def ensure_changelog_exists(file_path: str, create_if_missing: bool) -> None:
+    """
+    Check that the changelog file exists, and create it if necessary.
+
+    Args:
+        file_path (str): The path to the changelog file.
+        create_if_missing (bool): Specify whether to create the file if it does not exist.
+    """
+    if not os.path.exists(file_path):
+        if create_if_missing:
+            with open(file_path, "w") as file:
+                # Add the initial changelog title with a blank line
+                file.write(f"{CHANGELOG_TITLE}\n\n")
+            print(f"File '{file_path}' created with initial # Changelog header.")
+        else:
+            print(f"Error: The file '{file_path}' does not exist.")
+            sys.exit(1)
+
+
+def changelog_add_entries(
+    file_path: str,
+    entries: list[dict],
+    repository: str,
+    create_if_missing: bool,
+    index_path: str | None = None,
+) -> int:
+    """
+    Add new entries to the changelog file in a single pass.
+
+    Entries of PRs that are already listed in the changelog (or earlier in the batch)
+    are skipped. The rest are added to the changelog model, which parses the file only
+    up to the sections of the entries, and the file is written once. Within an environment group, later entries are listed
+    first, the same way as if they were added one by one.
+
+    Args:
+        file_path (str): The path to the changelog file.
+        entries (list[dict]): Entries with 'pr_number', 'title', 'environment'
+            (the environment label, e.g. '[dev]') and 'date' ('YYYY-MM-DD') keys.
+        repository (str): The GitHub repository in the format 'owner/repo'.
+        create_if_missing (bool): Specify whether to create the file if it does not exist.
+        index_path (str | None): The path to the index of PR numbers listed in the changelog.
+            If not set, the whole changelog is scanned once to collect the listed PRs.
+
+    Returns:
+        int: The number of added entries.
+    """
+    ensure_changelog_exists(file_path, create_if_missing)
+
+    with Changelog.open(file_path) as changelog:
+        # Locate the # Changelog title
+        if CHANGELOG_TITLE not in (line.rstrip("\r\n") for line in changelog.lines):
+            print("Error: The file does not have a '# Changelog' title.")
+            sys.exit(1)
+
+        # Collect PRs already listed in the changelog, scanning lines is faster than
+        # parsing the whole changelog model
+        if index_path:
+            pr_numbers: set[int] = load_pr_index(index_path, file_path, repository)
+        else:
+            pr_numbers = build_pr_index(file_path, repository)
+
+        added: int = 0
+        for entry in entries:
+            pr_number: int = int(entry["pr_number"])
+            if pr_number in pr_numbers:
+                print(
+                    f"PR #{pr_number} is already listed in the changelog. Skipping addition."
+                )
+                continue
+            date: str = entry["date"]
+            if not DATE_SECTION_PATTERN.match(f"## {date}"):
+                print(
+                    f"Error: Invalid date '{date}' of PR #{pr_number}, expected YYYY-MM-DD."
+                )
+                sys.exit(1)
+            pr_numbers.add(pr_number)
+            changelog.add_entry(
+                date,
+                entry["environment"],
+                Entry.create(pr_number, entry["title"], repository),
+            )
+            added += 1
+        if not added:
+            return 0
+
+        # Only the parsed head of the file is rewritten, the rest of it is copied
+        changelog.save()
+
+    if index_path:
+        save_pr_index(index_path, file_path, repository, pr_numbers)
+    return added
+
 
 def changelog_add_entry(
     file_path: str,
@@ -11,6 +209,7 @@ def changelog_add_entry(
     environment: str,
     repository: str,
     create_if_missing: bool,
+    index_path: str | None = None,
 ) -> None:
     """
     Add a new entry to the changelog file with the specified PR number and title.
@@ -22,105 +221,77 @@ def changelog_add_entry(
         environment (str): The environment label to categorize the PR entry.
         repository (str): The GitHub repository in the format 'owner/repo'.
         create_if_missing (bool): Specify whether to create the file if it does not exist.
+        index_path (str | None): The path to the index of PR numbers listed in the changelog.
+            If not set, the whole changelog is scanned to check if the PR is already listed.
     """
-    # Check if the file exists, and create it if necessary
-    if not os.path.exists(file_path):
-        if create_if_missing:
-            with open(file_path, "w") as file:
-                # Add the initial changelog title with a blank line
-                file.write("# Changelog\n\n")
-            print(f"File '{file_path}' created with initial # Changelog header.")
-        else:
-            print(f"Error: The file '{file_path}' does not exist.")
-            sys.exit(1)
-
-    current_date: str = datetime.now().strftime("%Y-%m-%d")
-
-    # Define the new entry lines with PR number and PR title
-    pr_line: str = (
-        f"- [associated PR](https://github.com/{repository}/pull/{pr_number})\n"
+    entry: dict = {
+        "pr_number": pr_number,
+        "title": pr_title,
+        "environment": environment,
+        "date": datetime.now().strftime("%Y-%m-%d"),
+    }
+    changelog_add_entries(
+        file_path=file_path,
+        entries=[entry],
+        repository=repository,
+        create_if_missing=create_if_missing,
+        index_path=index_path,
     )
-    new_entry_lines: list[str] = [
-        pr_line,
-        f"- {pr_title}\n",
-    ]
 
-    # Read the existing content of the file
-    with open(file_path, "r") as file:
-        lines: list[str] = file.readlines()
 
-    # Check if the PR line already exists in the changelog
-    if pr_line in lines:
-        print(f"PR #{pr_number} is already listed in the changelog. Skipping addition.")
-        return
+def load_entries(entries_path: str) -> list[dict]:
+    """
+    Load batch entries from a JSON array or a JSON Lines file.
 
-    # Locate the # Changelog title and check for a current date section
-    try:
-        changelog_index: int = lines.index("# Changelog\n") + 1
-    except ValueError:
-        print("Error: The file does not have a '# Changelog' title.")
-        sys.exit(1)
-
-    # Ensure there's a blank line after # Changelog
-    if lines[changelog_index] != "\n":
-        lines.insert(changelog_index, "\n")
-        changelog_index += 1
-
-    # Check if today's date section already exists
-    date_section_index = None
-    for i, line in enumerate(lines[changelog_index:], start=changelog_index):
-        if line.strip() == f"## {current_date}":
-            date_section_index: int = i
-            break
-
-    if date_section_index is not None:
-        # Check if the environment line is present after the date section
-        env_index: int = date_section_index + 2
-        if environment not in lines[env_index]:
-            # Insert the environment label if it's missing, followed by a blank line
-            lines.insert(env_index + 1, f"{environment}\n\n")
-            env_index += 2  # Account for inserted environment and newline
-
-        # Append the new entry lines after the environment section or at the end of the section
-        insert_index: int = env_index + 2
-        lines = lines[:insert_index] + new_entry_lines + lines[insert_index:]
-    else:
-        # Create a new date section with the current date, environment header, and blank lines
-        new_section: list[str] = (
-            [f"## {current_date}\n", "\n", f"{environment}\n", "\n"]
-            + new_entry_lines
-            + ["\n"]
-        )
-        lines = (
-            lines[: changelog_index + 1] + new_section + lines[changelog_index + 1 :]
-        )
+    Args:
+        entries_path (str): The path to the file with entries, '-' to read stdin.
 
-    # Write the modified content back to the file
-    with open(file_path, "w") as file:
-        file.writelines(lines)
+    Returns:
+        list[dict]: Entries with 'pr_number', 'title', and optional 'environment'
+            and 'date' keys.
+    """
+    if entries_path == "-":
+        content: str = sys.stdin.read()
+    else:
+        with open(entries_path, "r") as file:
+            content = file.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Update the changelog with a new PR entry."
+        description="Update the changelog with new PR entries."
     )
     parser.add_argument(
         "--repository",
         required=True,
         help="GitHub repository in the format 'owner/repo'",
     )
-    parser.add_argument("--pr-number", required=True, help="The pull request number")
+    parser.add_argument("--pr-number", help="The pull request number")
+    parser.add_argument("--pr-title", help="The pull request title or description")
     parser.add_argument(
-        "--pr-title", required=True, help="The pull request title or description"
+        "--entries",
+        default=None,
+        help="Path to a JSON array or JSON Lines file ('-' for stdin) of "
+        "{pr_number, title, environment, date} records to add in one pass, "
+        "instead of --pr-number and --pr-title. 'environment' defaults to "
+        "--environment and 'date' defaults to today.",
     )
     parser.add_argument(
         "--environment",
-        required=True,
+        default=None,
         help="Environment label (e.g., dev, staging) to categorize the PR entry",
     )
     parser.add_argument(
         "--changelog-path", required=True, help="Path to the CHANGELOG.md file"
     )
+    parser.add_argument(
+        "--index-path",
+        default=None,
+        help="Path to the index of PR numbers listed in the changelog, used to skip scanning the whole file for duplicates.",
+    )
     parser.add_argument(
         "--create-if-missing",
         choices=["enabled", "disabled"],
@@ -130,17 +301,49 @@ def main() -> None:
 
     args: argparse.Namespace = parser.parse_args()
 
-    environment: str = f"[{args.environment}]"
     create_if_missing: bool = args.create_if_missing == "enabled"
 
+    if args.entries:
+        current_date: str = datetime.now().strftime("%Y-%m-%d")
+        entries: list[dict] = []
+        for record in load_entries(args.entries):
+            environment: str | None = record.get("environment") or args.environment
+            if not environment:
+                parser.error(
+                    f"PR #{record['pr_number']} has no environment and --environment is not set"
+                )
+            entries.append(
+                {
+                    "pr_number": record["pr_number"],
+                    "title": record["title"],
+                    "environment": f"[{environment}]",
+                    "date": record.get("date") or current_date,
+                }
+            )
+        added: int = changelog_add_entries(
+            file_path=args.changelog_path,
+            entries=entries,
+            repository=args.repository,
+            create_if_missing=create_if_missing,
+            index_path=args.index_path,
+        )
+        print(f"Added {added} of {len(entries)} entries to the changelog.")
+        return
+
+    if not (args.pr_number and args.pr_title and args.environment):
+        parser.error(
+            "--pr-number, --pr-title and --environment are required without --entries"
+        )
+
     # Proceed with adding the entry to the changelog
     changelog_add_entry(
         file_path=args.changelog_path,
         pr_number=args.pr_number,
         pr_title=args.pr_title,
-        environment=environment,
+        environment=f"[{args.environment}]",
         repository=args.repository,
         create_if_missing=create_if_missing,
+        index_path=args.index_path,
     )
 
 
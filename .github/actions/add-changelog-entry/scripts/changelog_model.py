@@ -0,0 +1,524 @@
+"""
+Document model of CHANGELOG.md files maintained by the add-changelog-entry action.
+
+The changelog consists of a preamble (the # Changelog title), date sections ordered
+from the newest to the oldest, environment groups within sections and PR entries
+within groups:
+
+    # Changelog
+
+    ## 2025-01-15
+
+    [dev]
+
+    - [associated PR](https://github.com/owner/repo/pull/101)
+    - Update dependencies
+
+Every node keeps its own raw lines (including line endings and any lines the model
+doesn't recognize), so serializing a parsed changelog gives exactly the same text.
+The file is parsed lazily, section by section, and saving a partially parsed
+changelog copies the unparsed rest of the file as is.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+from collections.abc import Iterator
+
+
+DATE_SECTION_PATTERN: re.Pattern = re.compile(r"^## (\d{4}-\d{2}-\d{2})\s*$")
+ENVIRONMENT_PATTERN: re.Pattern = re.compile(r"^\[[^\]]+\]$")
+PR_LINE_PATTERN: re.Pattern = re.compile(
+    r"^- \[associated PR\]\(https://github\.com/(.+)/pull/(\d+)\)\s*$"
+)
+
+
+def _ensure_blank_line(lines: list[str]) -> None:
+    """
+    Make sure the lines end with a blank line, so a new node can follow them.
+
+    Args:
+        lines (list[str]): Lines of a node, modified in place.
+    """
+    if lines and not lines[-1].strip():
+        return
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    lines.append("\n")
+
+
+class Entry:
+    """
+    PR entry: the line with the PR link followed by description lines.
+    """
+
+    __slots__ = ("pr_number", "lines", "repository")
+
+    def __init__(
+        self, pr_number: int | None, lines: list[str], repository: str | None = None
+    ) -> None:
+        self.pr_number: int | None = pr_number
+        self.lines: list[str] = lines
+        self.repository: str | None = repository
+
+    @classmethod
+    def create(cls, pr_number: int, title: str, repository: str) -> "Entry":
+        """
+        Create an entry in the format used by the action.
+
+        Args:
+            pr_number (int): The pull request number.
+            title (str): The pull request title or description.
+            repository (str): The GitHub repository in the format 'owner/repo'.
+
+        Returns:
+            Entry: The new entry.
+        """
+        return cls(
+            pr_number,
+            [
+                f"- [associated PR](https://github.com/{repository}/pull/{pr_number})\n",
+                f"- {title}\n",
+            ],
+            repository,
+        )
+
+    @property
+    def title(self) -> str:
+        """
+        The first description line of the entry, without the list marker.
+        """
+        for line in self.lines[1:]:
+            if line.strip():
+                return line.strip().removeprefix("- ")
+        return ""
+
+    def serialize(self) -> str:
+        return "".join(self.lines)
+
+
+class EnvironmentGroup:
+    """
+    Group of entries under an environment label, e.g. '[dev]'.
+    """
+
+    __slots__ = ("environment", "lines", "entries")
+
+    def __init__(self, environment: str, lines: list[str]) -> None:
+        self.environment: str = environment
+        self.lines: list[str] = lines
+        self.entries: list[Entry] = []
+
+    def add_entry(self, entry: Entry) -> None:
+        """
+        Add the entry on top of the group.
+
+        Args:
+            entry (Entry): The entry to add.
+        """
+        if not self.entries:
+            _ensure_blank_line(self.lines)
+            _ensure_blank_line(entry.lines)
+        self.entries.insert(0, entry)
+
+    def last_lines(self) -> list[str]:
+        """
+        Lines of the last node of the group, which precede the next group or section.
+        """
+        return self.entries[-1].lines if self.entries else self.lines
+
+    def serialize(self) -> str:
+        return "".join(self.lines) + "".join(
+            entry.serialize() for entry in self.entries
+        )
+
+
+class DateSection:
+    """
+    Section of entries added at the same date, e.g. '## 2025-01-15'.
+    """
+
+    __slots__ = ("date", "lines", "groups")
+
+    def __init__(self, date: str, lines: list[str]) -> None:
+        self.date: str = date
+        self.lines: list[str] = lines
+        self.groups: list[EnvironmentGroup] = []
+
+    @classmethod
+    def parse(cls, lines: list[str]) -> "DateSection":
+        """
+        Parse the section from its lines, starting with the '## YYYY-MM-DD' heading.
+
+        Args:
+            lines (list[str]): Lines of the section.
+
+        Returns:
+            DateSection: The parsed section.
+        """
+        section = cls(DATE_SECTION_PATTERN.match(lines[0]).group(1), [lines[0]])
+        current: DateSection | EnvironmentGroup | Entry = section
+        for line in lines[1:]:
+            # Check the first characters before matching patterns, most lines are descriptions
+            if line.lstrip().startswith("["):
+                stripped: str = line.strip()
+                if ENVIRONMENT_PATTERN.match(stripped):
+                    current = EnvironmentGroup(stripped, [line])
+                    section.groups.append(current)
+                    continue
+            match = line.startswith("- [associated PR]") and PR_LINE_PATTERN.match(line)
+            if match and section.groups:
+                current = Entry(int(match.group(2)), [line], match.group(1))
+                section.groups[-1].entries.append(current)
+                continue
+            current.lines.append(line)
+        return section
+
+    def get_group(self, environment: str) -> EnvironmentGroup | None:
+        """
+        Find the group of the environment label, e.g. '[dev]'.
+        """
+        for group in self.groups:
+            if group.environment == environment:
+                return group
+        return None
+
+    def add_group(self, environment: str) -> EnvironmentGroup:
+        """
+        Add a new empty group of the environment label on top of the section.
+
+        Args:
+            environment (str): The environment label, e.g. '[dev]'.
+
+        Returns:
+            EnvironmentGroup: The new group.
+        """
+        _ensure_blank_line(self.lines)
+        group = EnvironmentGroup(environment, [f"{environment}\n", "\n"])
+        self.groups.insert(0, group)
+        return group
+
+    def last_lines(self) -> list[str]:
+        """
+        Lines of the last node of the section, which precede the next section.
+        """
+        return self.groups[-1].last_lines() if self.groups else self.lines
+
+    def serialize(self) -> str:
+        return "".join(self.lines) + "".join(
+            group.serialize() for group in self.groups
+        )
+
+
+def _read_blocks(file_path: str, offset: int) -> Iterator[tuple[list[str], int]]:
+    """
+    Read the changelog from the offset by blocks, each date section is a separate block.
+
+    Args:
+        file_path (str): The path to the changelog file.
+        offset (int): The byte offset to start from.
+
+    Yields:
+        tuple[list[str], int]: Lines of the block and the byte offset where the next block starts.
+    """
+    with open(file_path, "rb") as file:
+        file.seek(offset)
+        block: list[str] = []
+        for raw_line in file:
+            line: str = raw_line.decode("utf-8")
+            if block and line.startswith("## ") and DATE_SECTION_PATTERN.match(line):
+                yield block, offset
+                block = []
+            block.append(line)
+            offset += len(raw_line)
+        if block:
+            yield block, offset
+
+
+class Changelog:
+    """
+    Changelog document, which is parsed lazily as sections are requested.
+
+    Sections are expected to be ordered from the newest to the oldest, so queries
+    limited by a date stop parsing at the first older section (`get_section` also
+    handles sections out of order).
+    """
+
+    __slots__ = ("path", "lines", "sections", "_blocks", "_offset")
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path: str | None = path
+        self.lines: list[str] = []
+        self.sections: list[DateSection] = []
+        self._blocks: Iterator[tuple[list[str], int]] | None = None
+        self._offset: int = 0
+
+    @classmethod
+    def open(cls, path: str) -> "Changelog":
+        """
+        Open the changelog file, only the preamble is parsed.
+
+        Args:
+            path (str): The path to the changelog file.
+
+        Returns:
+            Changelog: The changelog, to be closed (or used as a context manager).
+        """
+        changelog = cls(path)
+        changelog._blocks = _read_blocks(path, 0)
+        block, offset = next(changelog._blocks, ([], 0))
+        if block and DATE_SECTION_PATTERN.match(block[0]):
+            changelog.sections.append(DateSection.parse(block))
+        else:
+            changelog.lines = block
+        changelog._offset = offset
+        return changelog
+
+    @classmethod
+    def parse(cls, text: str) -> "Changelog":
+        """
+        Parse the whole changelog from the text.
+
+        Args:
+            text (str): The changelog text.
+
+        Returns:
+            Changelog: The parsed changelog.
+        """
+        changelog = cls()
+        block: list[str] = changelog.lines
+        blocks: list[list[str]] = []
+        for line in re.findall(r"[^\n]*\n|[^\n]+$", text):
+            if DATE_SECTION_PATTERN.match(line):
+                block = []
+                blocks.append(block)
+            block.append(line)
+        changelog.sections = [DateSection.parse(block) for block in blocks]
+        return changelog
+
+    def close(self) -> None:
+        """
+        Close the changelog file, the unparsed sections can't be read anymore.
+        """
+        if self._blocks is not None:
+            self._blocks.close()
+
+    def __enter__(self) -> "Changelog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _parse_next(self) -> DateSection | None:
+        """
+        Parse the next section of the file.
+
+        Returns:
+            DateSection | None: The parsed section, or None if the whole file is parsed.
+        """
+        if self._blocks is None:
+            return None
+        block, self._offset = next(self._blocks, (None, self._offset))
+        if block is None:
+            self._blocks = None
+            return None
+        section: DateSection = DateSection.parse(block)
+        self.sections.append(section)
+        return section
+
+    def iter_sections(self) -> Iterator[DateSection]:
+        """
+        Iterate over the sections, parsing the file as needed.
+        """
+        index: int = 0
+        while True:
+            if index == len(self.sections) and self._parse_next() is None:
+                return
+            yield self.sections[index]
+            index += 1
+
+    def parse_all(self) -> None:
+        """
+        Parse the rest of the file.
+        """
+        while self._parse_next() is not None:
+            pass
+
+    def get_section(self, date: str) -> DateSection | None:
+        """
+        Find the section of the date, parsing stops at the first older section.
+
+        Sections may be out of order (e.g. edited by hand), so if the section is not
+        found before the first older one, the unparsed rest of the file is searched
+        for the date heading, and it's parsed only if the heading is there.
+        """
+        for section in self.iter_sections():
+            if section.date == date:
+                return section
+            if section.date < date:
+                break
+        for section in self.sections:
+            if section.date == date:
+                return section
+        if self._blocks is None or not self._has_unparsed_heading(date):
+            return None
+        self.parse_all()
+        return next(
+            (section for section in self.sections if section.date == date), None
+        )
+
+    def _has_unparsed_heading(self, date: str) -> bool:
+        """
+        Check if the unparsed rest of the file contains the heading of the date.
+        """
+        heading: bytes = f"## {date}".encode("utf-8")
+        with open(self.path, "rb") as file:
+            file.seek(self._offset)
+            return any(
+                line.startswith(heading)
+                and DATE_SECTION_PATTERN.match(line.decode("utf-8"))
+                for line in file
+            )
+
+    def add_section(self, date: str) -> DateSection:
+        """
+        Add a new empty section of the date before the first older section.
+
+        Args:
+            date (str): The date in the 'YYYY-MM-DD' format.
+
+        Returns:
+            DateSection: The new section.
+        """
+        index: int = 0
+        for index, section in enumerate(self.iter_sections()):
+            if section.date < date:
+                break
+        else:
+            index = len(self.sections)
+        previous_lines: list[str] = (
+            self.sections[index - 1].last_lines() if index else self.lines
+        )
+        _ensure_blank_line(previous_lines)
+        section = DateSection(date, [f"## {date}\n", "\n"])
+        self.sections.insert(index, section)
+        return section
+
+    def add_entry(self, date: str, environment: str, entry: Entry) -> None:
+        """
+        Add the entry on top of the environment group of the date section.
+
+        Missing sections and groups are created, new sections are added before the
+        first older section and new groups are added on top of the section.
+
+        Args:
+            date (str): The date in the 'YYYY-MM-DD' format.
+            environment (str): The environment label, e.g. '[dev]'.
+            entry (Entry): The entry to add.
+        """
+        section: DateSection = self.get_section(date) or self.add_section(date)
+        group: EnvironmentGroup = section.get_group(environment) or section.add_group(
+            environment
+        )
+        group.add_entry(entry)
+
+    def entries(
+        self, environment: str | None = None, since: str | None = None
+    ) -> Iterator[tuple[str, str, Entry]]:
+        """
+        Iterate over entries from the newest to the oldest.
+
+        Args:
+            environment (str | None): Only entries of the environment label, e.g. '[dev]'.
+            since (str | None): Only entries of sections from the date ('YYYY-MM-DD'),
+                parsing stops at the first older section.
+
+        Yields:
+            tuple[str, str, Entry]: The date, the environment label and the entry.
+        """
+        for section in self.iter_sections():
+            if since and section.date < since:
+                return
+            for group in section.groups:
+                if environment and group.environment != environment:
+                    continue
+                for entry in group.entries:
+                    yield section.date, group.environment, entry
+
+    def has_pr(self, pr_number: int, repository: str | None = None) -> bool:
+        """
+        Check if the PR is listed in the changelog, parsing stops when it's found.
+
+        Args:
+            pr_number (int): The pull request number.
+            repository (str | None): Only PRs of the repository ('owner/repo'), PRs
+                of all repositories by default.
+        """
+        return any(
+            entry.pr_number == pr_number
+            and (repository is None or entry.repository == repository)
+            for _, _, entry in self.entries()
+        )
+
+    def pr_numbers(self, repository: str | None = None) -> set[int]:
+        """
+        Collect numbers of all PRs listed in the changelog.
+
+        Args:
+            repository (str | None): Only PRs of the repository ('owner/repo'), PRs
+                of all repositories by default.
+        """
+        return {
+            entry.pr_number
+            for _, _, entry in self.entries()
+            if repository is None or entry.repository == repository
+        }
+
+    def serialize(self) -> str:
+        """
+        Serialize the whole changelog, exactly as parsed plus the changes.
+        """
+        self.parse_all()
+        return self._serialize_parsed()
+
+    def _serialize_parsed(self) -> str:
+        return "".join(self.lines) + "".join(
+            section.serialize() for section in self.sections
+        )
+
+    def save(self, path: str | None = None) -> None:
+        """
+        Atomically write the changelog, the unparsed rest of the file is copied as is.
+
+        The parsed part and the rest copied from the current file are written to a
+        temporary file, which then replaces the changelog, so the file is never left
+        half-written.
+
+        Args:
+            path (str | None): The path to write to, the opened file by default.
+        """
+        path = path or self.path
+        head: bytes = self._serialize_parsed().encode("utf-8")
+        directory: str = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as temp_file:
+            try:
+                temp_file.write(head)
+                if self._blocks is not None:
+                    with open(self.path, "rb") as file:
+                        file.seek(self._offset)
+                        shutil.copyfileobj(file, temp_file)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+                if os.path.exists(path):
+                    shutil.copymode(path, temp_file.name)
+            except BaseException:
+                os.unlink(temp_file.name)
+                raise
+        os.replace(temp_file.name, path)
+
+        # Continue parsing the unparsed rest from the new file
+        if self._blocks is not None and path == self.path:
+            self._blocks.close()
+            self._offset = len(head)
+            self._blocks = _read_blocks(path, self._offset)
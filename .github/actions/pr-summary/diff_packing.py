@@ -0,0 +1,259 @@
+import math
+import re
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import List, Optional, Tuple
+
+# Rough number of characters per token of code and English text for OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+# Files the prompt asks to ignore, and generated files: only their names and change size are sent
+IGNORED_PATTERNS = [
+    'README.md',
+    'CHANGELOG.md',
+    '.terraform-version',
+    '.terraform.lock.hcl',
+    'package-lock.json',
+    'yarn.lock',
+    'pnpm-lock.yaml',
+    'poetry.lock',
+    'uv.lock',
+    'Pipfile.lock',
+    'Gemfile.lock',
+    'composer.lock',
+    'Cargo.lock',
+    'go.sum',
+    '*.min.js',
+    '*.min.css',
+    '*.map',
+    '*.snap',
+]
+TEST_PATTERNS = ['test_*', '*_test.*', '*.spec.*', '*.test.*', 'tests/*', 'test/*', '*/tests/*', '*/test/*']
+DOC_PATTERNS = ['*.md', '*.rst', '*.txt', 'docs/*', '*/docs/*']
+
+HUNK_HEADER = re.compile(r'^@@ ', re.MULTILINE)
+
+@dataclass
+class FileChange:
+    """
+    Changes of a single file in a pull request.
+    Attributes:
+        filename (str): Path of the file.
+        status (str): Change status, e.g. "added", "modified", "removed".
+        patch (Optional[str]): Unified diff of the file, None for binary or too large diffs.
+        additions (int): Number of added lines.
+        deletions (int): Number of removed lines.
+    """
+    filename: str
+    status: str
+    patch: Optional[str] = None
+    additions: int = 0
+    deletions: int = 0
+
+@dataclass
+class PackedDiff:
+    """
+    Code changes packed into a token budget.
+    Attributes:
+        text (str): Code changes to pass to the prompt.
+        tokens (int): Estimated number of tokens of the text.
+        included_files (List[str]): Files with the whole patch included.
+        truncated_files (List[str]): Files with the patch cut at a hunk boundary.
+        omitted_files (List[str]): Files which patches didn't fit the budget.
+        ignored_files (List[str]): Ignored and generated files, only their change size is included.
+    """
+    text: str
+    tokens: int
+    included_files: List[str] = field(default_factory=list)
+    truncated_files: List[str] = field(default_factory=list)
+    omitted_files: List[str] = field(default_factory=list)
+    ignored_files: List[str] = field(default_factory=list)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of the text without loading a tokenizer.
+    Args:
+        text (str): Text to estimate.
+    Returns:
+        int: Estimated number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _matches(filename: str, patterns: List[str]) -> bool:
+    basename = filename.rsplit('/', 1)[-1]
+    return any(fnmatch(filename, pattern) or fnmatch(basename, pattern) for pattern in patterns)
+
+def is_ignored(filename: str) -> bool:
+    """Return whether the file is ignored by the prompt or generated (e.g. lockfiles)."""
+    return _matches(filename, IGNORED_PATTERNS)
+
+def file_priority(filename: str) -> int:
+    """Return the priority of the file changes: 0 for code and configs, 1 for tests, 2 for docs."""
+    if _matches(filename, TEST_PATTERNS):
+        return 1
+    if _matches(filename, DOC_PATTERNS):
+        return 2
+    return 0
+
+def split_hunks(patch: str) -> List[str]:
+    """
+    Split the unified diff into hunks, starting with `@@` lines.
+    Lines before the first hunk (e.g. git diff headers) are kept with the first hunk.
+    Args:
+        patch (str): Unified diff of a file.
+    Returns:
+        List[str]: Hunks, which joined give the patch back.
+    """
+    starts = [match.start() for match in HUNK_HEADER.finditer(patch)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(patch))
+    return [patch[start:end] for start, end in zip(starts, starts[1:]) if end > start]
+
+def _cut_lines(text: str, tokens: int) -> str:
+    """Return the leading complete lines of the text which fit the tokens."""
+    text = text[:tokens * CHARS_PER_TOKEN]
+    return text[:text.rfind('\n') + 1]
+
+class _PackedFile:
+    """Packing state of a file: its hunks and how many of them are included."""
+    def __init__(self, change: FileChange):
+        self.change = change
+        self.header = f'{change.filename} ({change.status}): '
+        self.hunks = split_hunks(change.patch)
+        self.hunk_tokens = [estimate_tokens(hunk) for hunk in self.hunks]
+        self.included = 0
+        self.partial = None
+
+    def take(self, budget: int) -> int:
+        """Include the following hunks which fit the budget, return the number of used tokens."""
+        used = 0 if self.included else estimate_tokens(self.header)
+        if used >= budget:
+            return 0
+        while self.included < len(self.hunks) and used + self.hunk_tokens[self.included] <= budget:
+            used += self.hunk_tokens[self.included]
+            self.included += 1
+        if not self.included:
+            # A single hunk is larger than the budget, include its leading lines
+            self.partial = _cut_lines(self.hunks[0], budget - used)
+            if not self.partial:
+                return 0
+            used += estimate_tokens(self.partial)
+        return used
+
+    def render(self) -> str:
+        text = (self.header + ''.join(self.hunks[:self.included]) + (self.partial or '')).rstrip('\n')
+        omitted = len(self.hunks) - self.included
+        if omitted:
+            text += f'\n... ({omitted} more hunks omitted due to size limit)'
+        return text
+
+def pack_diff(files: List[FileChange], token_budget: int, max_file_share: float = 0.25) -> PackedDiff:
+    """
+    Pack file patches into the token budget, so meaningful changes are included first.
+    Ignored and generated files (see `IGNORED_PATTERNS`) are listed with their change size only.
+    The rest are ranked by type (code and configs, then tests, then docs) and change size, and
+    each file gets up to `max_file_share` of the budget, so a single huge patch can't push out
+    the other files. Budget left after that is given to the cut patches in the same order.
+    Patches are cut at hunk boundaries, a single oversized hunk is cut at a line boundary.
+    Lines about ignored files and files without patches are always included.
+    Args:
+        files (List[FileChange]): Changes of the pull request files.
+        token_budget (int): Maximum estimated number of tokens of the packed code changes.
+        max_file_share (float): Share of the budget a file gets before the rest of files.
+    Returns:
+        PackedDiff: Packed code changes with statistics.
+    """
+    packed = PackedDiff(text='', tokens=0)
+    lines = []
+    candidates = []
+    for change in files:
+        ignored = is_ignored(change.filename)
+        if ignored or not change.patch:
+            reason = 'ignored or generated file' if ignored else 'patch not available'
+            lines.append(f'{change.filename} ({change.status}): {reason}, +{change.additions} -{change.deletions}')
+            if ignored:
+                packed.ignored_files.append(change.filename)
+            continue
+        candidates.append(_PackedFile(change))
+    remaining = token_budget - sum(estimate_tokens(line) for line in lines)
+
+    candidates.sort(key=lambda item: (
+        file_priority(item.change.filename),
+        -(item.change.additions + item.change.deletions),
+    ))
+    file_budget = max(1, int(token_budget * max_file_share))
+    for candidate in candidates:
+        remaining -= candidate.take(min(file_budget, remaining))
+    for candidate in candidates:
+        if candidate.included and candidate.included < len(candidate.hunks):
+            remaining -= candidate.take(remaining)
+
+    entries = []
+    for candidate in candidates:
+        if not candidate.included and not candidate.partial:
+            packed.omitted_files.append(candidate.change.filename)
+            continue
+        if candidate.included == len(candidate.hunks):
+            packed.included_files.append(candidate.change.filename)
+        else:
+            packed.truncated_files.append(candidate.change.filename)
+        entries.append(candidate.render())
+    if packed.omitted_files:
+        entries.append(
+            f'... (patches of {len(packed.omitted_files)} files omitted due to size limit: '
+            f'{", ".join(packed.omitted_files)})'
+        )
+    packed.text = '\n'.join(entries + lines)
+    packed.tokens = estimate_tokens(packed.text)
+    return packed
+
+def component_of(filename: str) -> str:
+    """
+    Return the component the file belongs to, following the repository layout described in the
+    default prompt: `stacks/<kind>/<name>/` and `envs/<env>/`, otherwise the top-level directory.
+    Args:
+        filename (str): Path of the file.
+    Returns:
+        str: Component path, e.g. "stacks/apps/api", "envs/dev" or "." for files in the root.
+    """
+    parts = filename.split('/')
+    if parts[0] == 'stacks' and len(parts) > 3:
+        return '/'.join(parts[:3])
+    if len(parts) > 1:
+        return '/'.join(parts[:2]) if parts[0] == 'envs' and len(parts) > 2 else parts[0]
+    return '.'
+
+def chunk_changes(files: List[FileChange], token_budget: int) -> List[Tuple[str, List[FileChange]]]:
+    """
+    Split file changes into chunks by component, to be summarized separately.
+    Small components are merged into one chunk while their patches fit the budget, a component
+    larger than the budget is a chunk of its own (and is packed with `pack_diff` later).
+    Ignored and generated files are skipped.
+    Args:
+        files (List[FileChange]): Changes of the pull request files.
+        token_budget (int): Maximum estimated number of tokens of code changes of a chunk.
+    Returns:
+        List[Tuple[str, List[FileChange]]]: Chunks as pairs of the component names and their files.
+    """
+    components = {}
+    for change in files:
+        if not is_ignored(change.filename):
+            components.setdefault(component_of(change.filename), []).append(change)
+
+    chunks = []
+    names, chunk_files, chunk_tokens = [], [], 0
+    for name in sorted(components):
+        tokens = sum(
+            estimate_tokens(f'{change.filename} ({change.status}): {change.patch or ""}')
+            for change in components[name]
+        )
+        if chunk_files and chunk_tokens + tokens > token_budget:
+            chunks.append((', '.join(names), chunk_files))
+            names, chunk_files, chunk_tokens = [], [], 0
+        names.append(name)
+        chunk_files.extend(components[name])
+        chunk_tokens += tokens
+    if chunk_files:
+        chunks.append((', '.join(names), chunk_files))
+    return chunks
@@ -0,0 +1,204 @@
+import logging
+import subprocess
+import tempfile
+from typing import Iterator, List, Optional
+
+from github import GithubException
+
+from diff_packing import FileChange
+
+logger = logging.getLogger(__name__)
+
+# The compare API returns at most 300 files, larger comparisons are incomplete
+MAX_COMPARE_FILES = 300
+
+class DiffError(Exception):
+    """Changes can't be fetched from the diff source."""
+
+class DiffProvider:
+    """
+    Source of changes of a pull request.
+    """
+    name = None
+
+    def pull_request_changes(self) -> List[FileChange]:
+        """
+        Return changes of the pull request files (between the merge base and the head).
+        Raises:
+            DiffError: If the changes can't be fetched.
+        """
+        raise NotImplementedError
+
+    def changes_since(self, sha: str) -> Optional[List[FileChange]]:
+        """
+        Return changes between the commit and the pull request head.
+        Returns:
+            Optional[List[FileChange]]: Changes of files, or None if the head isn't a descendant
+            of the commit (e.g. it was force-pushed away) or the changes can't be fetched.
+        """
+        raise NotImplementedError
+
+class GithubDiffProvider(DiffProvider):
+    """
+    Changes from the GitHub API: the pull request files and the compare API.
+    Patches are missing for large diffs and the number of files is limited.
+    """
+    name = 'github'
+
+    def __init__(self, pull_request):
+        """
+        Args:
+            pull_request: PyGithub PullRequest.
+        """
+        self.pull_request = pull_request
+
+    def pull_request_changes(self) -> List[FileChange]:
+        try:
+            return [
+                FileChange(f.filename, f.status, f.patch, f.additions, f.deletions)
+                for f in self.pull_request.get_files()
+            ]
+        except GithubException as error:
+            raise DiffError(str(error)) from error
+
+    def changes_since(self, sha: str) -> Optional[List[FileChange]]:
+        try:
+            comparison = self.pull_request.base.repo.compare(sha, self.pull_request.head.sha)
+        except GithubException as error:
+            logger.info('Comparing with %s failed: %s', sha, error)
+            return None
+        if comparison.status != 'ahead' or len(comparison.files) >= MAX_COMPARE_FILES:
+            return None
+        return [
+            FileChange(f.filename, f.status, f.patch, f.additions, f.deletions)
+            for f in comparison.files
+        ]
+
+def _diff_path(line: str, prefix: str) -> Optional[str]:
+    """Return the path of a `--- a/path` or `+++ b/path` line, None for /dev/null."""
+    # Git ends paths with spaces with a tab
+    path = line[len(prefix):].rstrip('\n').rstrip('\t')
+    if path == '/dev/null':
+        return None
+    return path[2:] if path[1:2] == '/' else path
+
+def _join_patch(hunks: List[str]) -> Optional[str]:
+    """Join patch lines without the trailing newline, like patches of the GitHub API."""
+    return ''.join(hunks).removesuffix('\n') or None
+
+def parse_git_diff(lines: Iterator[str]) -> Iterator[FileChange]:
+    """
+    Parse output of `git diff --numstat --patch` incrementally, yielding changes file by file.
+    Numstat lines go first, in the same order as the patches. Patches are cut to start with
+    the first hunk, like patches of the GitHub API.
+    Args:
+        lines (Iterator[str]): Lines of the output.
+    Yields:
+        FileChange: Changes of a file.
+    """
+    numstat = []
+    files_count = 0
+    change = None
+    hunks = []
+    for line in lines:
+        if line.startswith('diff --git '):
+            if change:
+                change.patch = _join_patch(hunks)
+                yield change
+            additions, deletions = numstat[files_count] if files_count < len(numstat) else (0, 0)
+            files_count += 1
+            # Path from the header, overwritten by ---/+++ and rename lines, which are unambiguous
+            change = FileChange(line.rstrip('\n').rsplit(' b/', 1)[-1], 'modified', None, additions, deletions)
+            hunks = []
+        elif change is None:
+            if not line.strip():
+                continue
+            added, deleted, _ = line.split('\t', 2)
+            numstat.append((
+                int(added) if added != '-' else 0,
+                int(deleted) if deleted != '-' else 0,
+            ))
+        elif hunks:
+            hunks.append(line)
+        elif line.startswith('@@'):
+            hunks.append(line)
+        elif line.startswith('new file mode'):
+            change.status = 'added'
+        elif line.startswith('deleted file mode'):
+            change.status = 'removed'
+        elif line.startswith('rename to '):
+            change.status = 'renamed'
+            change.filename = line[len('rename to '):].rstrip('\n')
+        elif line.startswith('--- '):
+            path = _diff_path(line, '--- ')
+            if path and change.status == 'removed':
+                change.filename = path
+        elif line.startswith('+++ '):
+            path = _diff_path(line, '+++ ')
+            if path:
+                change.filename = path
+    if change:
+        change.patch = _join_patch(hunks)
+        yield change
+
+class LocalGitDiffProvider(DiffProvider):
+    """
+    Changes from the local checkout of the repository, computed with a single `git diff` call,
+    which output is parsed while it's streamed. Both the base and the head commits must be
+    available locally (e.g. checkout with `fetch-depth: 0`).
+    """
+    name = 'local'
+
+    def __init__(self, repo_path: str, base_sha: str, head_sha: str):
+        """
+        Args:
+            repo_path (str): Path to the local repository.
+            base_sha (str): Base commit of the pull request.
+            head_sha (str): Head commit of the pull request.
+        """
+        self.repo_path = repo_path
+        self.base_sha = base_sha
+        self.head_sha = head_sha
+
+    def _git(self, *args: str) -> List[str]:
+        return ['git', '-C', self.repo_path, '-c', 'core.quotePath=false', *args]
+
+    def _diff(self, revisions: str) -> List[FileChange]:
+        """
+        Run `git diff --numstat --patch` for the revisions and parse its output.
+        Raises:
+            DiffError: If git fails, e.g. a commit is missing.
+        """
+        # Stderr goes to a file: a pipe read after stdout could fill up and block git
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                self._git('diff', '--no-color', '--no-ext-diff', '--find-renames', '--numstat', '--patch', revisions),
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+                errors='replace',
+            )
+            with process:
+                changes = list(parse_git_diff(process.stdout))
+            if process.returncode:
+                stderr.seek(0)
+                message = stderr.read().decode(errors='replace').strip()
+                raise DiffError(f'git diff {revisions} failed: {message}')
+        return changes
+
+    def pull_request_changes(self) -> List[FileChange]:
+        # Three dots: changes since the merge base, like the pull request files
+        return self._diff(f'{self.base_sha}...{self.head_sha}')
+
+    def changes_since(self, sha: str) -> Optional[List[FileChange]]:
+        is_ancestor = subprocess.run(
+            self._git('merge-base', '--is-ancestor', sha, self.head_sha),
+            capture_output=True,
+        )
+        if is_ancestor.returncode:
+            return None
+        try:
+            return self._diff(f'{sha}..{self.head_sha}')
+        except DiffError as error:
+            logger.info('%s', error)
+            return None
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+import requests
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Headers which describe the encoded body, while the body is stored decoded
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+class HttpCache:
+    """
+    On-disk cache of GET responses with ETag or Last-Modified headers, one JSON file per response.
+    Cached responses are revalidated with conditional requests: GitHub answers 304 Not Modified
+    without the body if nothing changed, and such requests don't count against the rate limit.
+    The total size of the files is bounded, the least recently used responses are evicted first.
+    The directory can be kept between runs with actions/cache.
+    """
+    def __init__(self, directory: str, max_bytes: int = 50 * 2 ** 20):
+        """
+        Args:
+            directory (str): Directory with cached responses.
+            max_bytes (int): Maximum total size of cached responses.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.requests = 0
+        self.hits = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(request: requests.PreparedRequest) -> str:
+        """
+        Return the cache key of the request: GitHub responses vary by the Accept header.
+        The token is not a part of the key, as every workflow run gets a new GITHUB_TOKEN. Cached
+        responses are only used after a conditional request with the current token, so GitHub
+        still checks its access to the resource.
+        """
+        parts = [request.url, request.headers.get('Accept', '')]
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached response (URL, headers and body), None on a miss."""
+        try:
+            with open(self._path(key), encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # Modification time is the last use time for the LRU eviction
+        os.utime(self._path(key))
+        return entry
+
+    def put(self, key: str, response: requests.Response) -> None:
+        """Store the response, written atomically as requests may run in several threads."""
+        entry = {
+            'url': response.url,
+            'headers': {name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS},
+            'body': response.text,
+        }
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, self._path(key))
+
+    def record(self, hit: bool, bytes_saved: int = 0) -> None:
+        with self._lock:
+            self.requests += 1
+            self.hits += hit
+            self.bytes_saved += bytes_saved
+
+    def prune(self) -> int:
+        """
+        Evict the least recently used responses until the cache fits `max_bytes`.
+        Returns:
+            int: Number of evicted responses.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def report(self) -> None:
+        """Log the hit ratio and the bytes saved, and write them to the step output in GitHub Actions."""
+        evicted = self.prune()
+        ratio = self.hits / self.requests if self.requests else 0
+        logger.info(
+            'HTTP cache: %d of %d GET requests not modified (%.0f%%), %.1f KB not downloaded, %d responses evicted',
+            self.hits, self.requests, ratio * 100, self.bytes_saved / 1024, evicted,
+        )
+        output_path = os.environ.get('GITHUB_OUTPUT')
+        if output_path:
+            with open(output_path, 'a') as file:
+                file.write(f'http-cache-hit-ratio={ratio:.2f}\nhttp-cache-bytes-saved={self.bytes_saved}\n')
+
+class ConditionalRequestAdapter(HTTPAdapter):
+    """
+    Transport adapter sending GET requests with If-None-Match and If-Modified-Since headers of the
+    cached response, and answering 304 Not Modified responses with the cached body.
+    """
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+        key = self.cache.key(request)
+        cached = self.cache.get(key)
+        if cached:
+            headers = CaseInsensitiveDict(cached['headers'])
+            if 'ETag' in headers:
+                request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and cached:
+            # Read the empty body, so the connection is released to the pool before the body is replaced
+            response.content
+            body = cached['body'].encode('utf-8')
+            self.cache.record(hit=True, bytes_saved=len(body))
+            # Fresh headers (e.g. rate limit) over the cached ones, which keep pagination links
+            headers.update({name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS})
+            response.status_code = 200
+            response.reason = 'OK'
+            response.headers = headers
+            response._content = body
+            response.encoding = 'utf-8'
+            return response
+        self.cache.record(hit=False)
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            self.cache.put(key, response)
+        return response
+
+def _caching_connection_class(base: type, cache: HttpCache, sessions: dict, lock: threading.Lock) -> type:
+    """
+    Return a subclass of the PyGithub connection class which sends requests through the cache.
+    PyGithub creates a connection object for every request when the connection classes are injected,
+    so the objects share a session (one per protocol), which keeps the connections open.
+    """
+    class CachingConnectionClass(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            with lock:
+                if self.protocol not in sessions:
+                    self.adapter = ConditionalRequestAdapter(
+                        cache,
+                        max_retries=self.retry,
+                        pool_connections=self.pool_size,
+                        pool_maxsize=self.pool_size,
+                    )
+                    self.session.mount(f'{self.protocol}://', self.adapter)
+                    sessions[self.protocol] = self.session
+                else:
+                    self.session.close()
+            self.session = sessions[self.protocol]
+
+        def close(self) -> None:
+            # Called for the previous connection object on every request, the shared session stays open
+            pass
+
+    return CachingConnectionClass
+
+def install(cache: HttpCache) -> None:
+    """
+    Make PyGithub clients created after the call send requests through the cache.
+    Args:
+        cache (HttpCache): Cache of responses.
+    """
+    sessions = {}
+    lock = threading.Lock()
+    Requester.injectConnectionClasses(
+        _caching_connection_class(HTTPRequestsConnectionClass, cache, sessions, lock),
+        _caching_connection_class(HTTPSRequestsConnectionClass, cache, sessions, lock),
+    )
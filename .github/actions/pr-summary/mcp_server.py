@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import shutil
+import time
+from typing import Optional
+
+from agents.mcp import MCPServerStdio
+
+logger = logging.getLogger(__name__)
+
+class McpGitServer:
+    """
+    MCP git server shared by all summaries of a run (e.g. PRs of a batch), started once on first use.
+    The server runs in a task of its own, so it can be started and stopped from any task: stdio
+    servers must be stopped in the task which started them.
+    The pre-installed `mcp-server-git` executable (see action.yaml) is used if it's on the PATH,
+    otherwise `uvx` downloads the server, which may take time.
+    """
+    def __init__(self, repo_path: str, timeout: float = 30):
+        """
+        Args:
+            repo_path (str): Local repository path the server gives access to.
+            timeout (float): Timeout of MCP requests, in seconds.
+        """
+        self.repo_path = repo_path
+        self.timeout = timeout
+        self.startup_seconds = None
+        self._ready: Optional[asyncio.Future] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def params(self) -> dict:
+        """Return the command to start the server with."""
+        args = ['--repository', str(self.repo_path)]
+        if shutil.which('mcp-server-git'):
+            return {'command': 'mcp-server-git', 'args': args}
+        return {'command': 'uvx', 'args': ['mcp-server-git', *args]}
+
+    async def get(self) -> MCPServerStdio:
+        """
+        Return the running server, starting it on the first call.
+        Raises:
+            Exception: If the server failed to start.
+        """
+        if self._task is None:
+            self._ready = asyncio.get_running_loop().create_future()
+            self._stopped = asyncio.Event()
+            self._task = asyncio.ensure_future(self._serve())
+        # Cancelling one of the waiting summaries must not stop the start for the others
+        return await asyncio.shield(self._ready)
+
+    async def _serve(self) -> None:
+        started = time.perf_counter()
+        params = self.params()
+        try:
+            # Tools are listed once per server, so they are listed once per run
+            async with MCPServerStdio(
+                cache_tools_list=True,
+                params=params,
+                client_session_timeout_seconds=self.timeout,
+            ) as server:
+                self.startup_seconds = time.perf_counter() - started
+                logger.info('Starting MCP server (%s) took %.2fs', params['command'], self.startup_seconds)
+                self._ready.set_result(server)
+                await self._stopped.wait()
+        except asyncio.CancelledError:
+            self._ready.cancel()
+            raise
+        except BaseException as error:
+            if not self._ready.done():
+                self._ready.set_exception(error)
+            raise
+
+    async def close(self) -> None:
+        """Stop the server if it was started, a start in progress is cancelled."""
+        if self._task is None:
+            return
+        self._stopped.set()
+        if not self._ready.done():
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            if not self._task.cancelled():
+                raise
+        except Exception:
+            # The start failure was already raised to the summaries
+            pass
+        self._task = None
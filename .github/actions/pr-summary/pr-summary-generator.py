@@ -1,17 +1,92 @@
 import argparse
 import asyncio
+import contextvars
+import json
+import logging
 import os
 import re
+import sys
+import time
 import yaml
-from dataclasses import dataclass
-from typing import Set, List
+from dataclasses import asdict, dataclass, replace
+from typing import List, Optional, Set
 
 from agents import Agent, Runner
-from agents.mcp import MCPServerStdio
-from github import Auth, Github, Commit
+from github import Auth, Consts, Github, Commit, GithubException, RateLimitExceededException
+from openai import RateLimitError
+
+from diff_packing import FileChange, chunk_changes, pack_diff
+from diff_provider import DiffError, DiffProvider, GithubDiffProvider, LocalGitDiffProvider
+from http_cache import HttpCache, install as install_http_cache
+from mcp_server import McpGitServer
+from summary_cache import SummaryCache, extract_previous_summary, format_marker, read_marker, summary_cache_key
 
 AI_MARKER = '**generated by'
 
+# Prompt of the map step of map-reduce summarization, the reduce step uses the OpenAI prompt
+CHUNK_PROMPT = """You are summarizing one part of a large pull request: the changes of {component}.
+Describe what was changed and why it matters in 1-5 short bullet points, in a neutral and factual way.
+Ignore formatting, typo fixes, version bumps and lockfiles. Do not list changes per file.
+
+Changed files:
+{all_files}
+
+Code changes:
+{code_changes}
+
+Respond ONLY with the bullet points."""
+
+# Code changes of incremental summaries: the previous summary and the changes pushed after it
+INCREMENTAL_CHANGES = """The pull request already has a summary of its earlier changes (the current state):
+{previous_summary}
+Update this summary to describe the whole pull request, taking into account the changes pushed since then.
+Keep the points which are still valid.
+
+Changes pushed since the previous summary:
+{code_changes}"""
+
+# Backoff after rate limit errors without a reset time, doubled on every retry
+RETRY_BACKOFF_SECONDS = 10
+MAX_RETRY_DELAY_SECONDS = 600
+
+logger = logging.getLogger(__name__)
+
+# Number of the PR summarized in the current task, to tell log messages of a batch apart
+current_pr_number = contextvars.ContextVar('current_pr_number', default=None)
+
+class PrNumberFilter(logging.Filter):
+    """Add the `pr` attribute to log records: a prefix with the PR number summarized in a batch."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        pr_number = current_pr_number.get()
+        record.pr = f'PR #{pr_number}: ' if pr_number else ''
+        return True
+
+def log_duration(phase: str, started: float) -> None:
+    """
+    Log how long a phase of the summary generation took.
+    Args:
+        phase (str): Name of the phase.
+        started (float): `time.perf_counter()` value at the start of the phase.
+    """
+    logger.info('%s took %.2fs', phase, time.perf_counter() - started)
+
+async def run_in_thread(phase: str, func, *args):
+    """
+    Run a blocking call (e.g. paginated PyGithub request) in a thread and log its duration.
+    Args:
+        phase (str): Name of the phase to log.
+        func: Blocking function to call.
+        *args: Arguments of the function.
+    Returns:
+        Result of the function.
+    """
+    def timed_call():
+        started = time.perf_counter()
+        result = func(*args)
+        log_duration(phase, started)
+        return result
+    return await asyncio.to_thread(timed_call)
+
 @dataclass
 class Summary:
     """
@@ -21,11 +96,13 @@ class Summary:
         jira_issues (Set[str]): Set of JIRA issue identifiers.
         jira_url (str): Base URL of the JIRA system.
         model (str): Model used to generate the analysis.
+        metadata (dict): Data for later runs (e.g. cache key), stored in a hidden marker.
     """
     analysis: str
     jira_issues: Set[str]
     jira_url: str
     model: str
+    metadata: dict = None
 
     def __str__(self) -> str:
         """
@@ -46,7 +123,8 @@ class Summary:
             '### Summary\n\n'
             f'{tasks}\n\n'
             f'{self.analysis}\n\n'
-            f'**generated by {self.model}**\n'
+            f'**generated by {self.model}**'
+            f'{" " + format_marker(self.metadata) if self.metadata else ""}\n'
         )
 
 @dataclass
@@ -61,6 +139,21 @@ class AgentConfig:
         pr_number (int): Pull request number to process.
         repo_path (str): Local repository path used by MCP server.
         repository (str): GitHub repository in format "owner/repo".
+        output_file (str): Path to write raw AI YAML output.
+        code_changes_token_budget (int): Maximum estimated number of tokens of code changes in the prompt.
+        map_reduce (str): When to summarize the changes by chunks first: "auto" (when the code changes
+            don't fit the budget), "always" or "never".
+        chunk_token_budget (int): Maximum estimated number of tokens of code changes of a chunk.
+        map_concurrency (int): Maximum number of chunks summarized at the same time.
+        cache (SummaryCache): Cache of summaries by the changes, disabled if not set.
+        incremental (bool): Summarize only the changes since the head commit of the previous summary.
+        diff_source (str): Where to get the changes from: "auto" (local repository, falling back to
+            the GitHub API), "local" or "github".
+        mcp_server (McpGitServer): MCP git server shared by summaries, a server is started and stopped
+            for the summary if not set.
+        available_labels (Optional[List[str]]): Taggable labels of the repository shared by summaries,
+            fetched for the summary if not set.
+        apply_labels (bool): Add the chosen labels to the PR, otherwise they are only written to `output_file`.
     """
     github_client: Github
     jira_url: str
@@ -70,6 +163,16 @@ class AgentConfig:
     repo_path: str
     repository: str
     output_file: str = None
+    code_changes_token_budget: int = 200000
+    map_reduce: str = 'auto'
+    chunk_token_budget: int = 50000
+    map_concurrency: int = 4
+    cache: SummaryCache = None
+    incremental: bool = True
+    diff_source: str = 'auto'
+    mcp_server: McpGitServer = None
+    available_labels: Optional[List[str]] = None
+    apply_labels: bool = False
 
 class PrSummaryAgent:
     """
@@ -94,57 +197,41 @@ class PrSummaryAgent:
             github.GithubException: If fetching the repository or PR fails.
             ValueError: If the OpenAI prompt is missing or malformed.
         """
-        repository = self.config.github_client.get_repo(self.config.repository)
-        pull_request = repository.get_pull(self.config.pr_number)
+        run_started = time.perf_counter()
+        # GitHub data is fetched in background threads, while the MCP server starts (after the
+        # cache check, which needs only the changes and labels, if the cache is enabled)
+        key_inputs = asyncio.get_running_loop().create_future()
+        fetch = asyncio.ensure_future(self._fetch_github_data(key_inputs))
+        mcp_server = self.config.mcp_server or McpGitServer(self.config.repo_path)
+        try:
+            raw_output = None
+            metadata = {}
+            if self.config.cache:
+                await asyncio.wait((key_inputs, fetch), return_when=asyncio.FIRST_COMPLETED)
+                if not key_inputs.done():
+                    # The fetch failed, raise its error
+                    await fetch
+                pull_request, changes, available_labels = key_inputs.result()
+                metadata['cache_key'] = summary_cache_key(
+                    changes, self.config.model, self.config.openai_prompt, available_labels,
+                )
+                raw_output = self.config.cache.get(metadata['cache_key'], pull_request.body or '')
+                logger.info('Summary cache %s', 'hit' if raw_output is not None else 'miss')
+            if raw_output is None:
+                # Not started at all on a cache hit
+                raw_output = await self._generate(fetch, asyncio.ensure_future(mcp_server.get()))
+                if self.config.cache:
+                    self.config.cache.put(metadata['cache_key'], raw_output)
+            pull_request, changes, commits, available_labels = await fetch
+            metadata['head_sha'] = pull_request.head.sha
+        except BaseException:
+            fetch.cancel()
+            raise
+        finally:
+            if mcp_server is not self.config.mcp_server:
+                await mcp_server.close()
 
-        files = list(pull_request.get_files())
-        commits = list(pull_request.get_commits())
         jira_issues = extract_jira_issues(commits)
-
-        available_labels = get_taggable_labels(repository)
-
-        all_files, code_changes = [], []
-        # Limit code changes to avoid exceeding the model's context window
-        max_code_changes_chars = 900000
-        code_changes_size = 0
-        for f in files:
-            all_files.append(f.filename)
-            if code_changes_size >= max_code_changes_chars:
-                continue
-            patch = f.patch or ''
-            entry = f"{f.filename} ({f.status}): {patch}"
-            if code_changes_size + len(entry) > max_code_changes_chars:
-                code_changes.append('... (remaining patches truncated due to size limit)')
-                code_changes_size = max_code_changes_chars
-                continue
-            code_changes.append(entry)
-            code_changes_size += len(entry)
-
-        full_prompt = self.config.openai_prompt.format(
-            all_files='\n'.join(all_files),
-            code_changes='\n'.join(code_changes),
-            available_labels=', '.join(available_labels),
-        )
-
-        # uvx may take time to download mcp-server-git.
-        # increased timeout prevent flaky McpError: Timed out failures
-        async with MCPServerStdio(
-            cache_tools_list=True,
-            params={
-                'command': 'uvx',
-                'args': ['mcp-server-git', '--repository', str(self.config.repo_path)],
-            },
-            client_session_timeout_seconds=30,
-        ) as server:
-            agent = Agent(
-                name='PR Summary Agent',
-                instructions='You are a helpful assistant that generates pull request summaries.',
-                mcp_servers=[server],
-                model=self.config.model,
-            )
-            result = await Runner.run(starting_agent=agent, input=full_prompt)
-            raw_output = result.final_output.strip()
-
         parsed = yaml.safe_load(raw_output)
         analysis = parsed.get('summary', raw_output).strip()
         filtered_labels = [l for l in parsed.get('labels', []) if l in available_labels]
@@ -152,13 +239,254 @@ class PrSummaryAgent:
         if self.config.output_file:
             with open(self.config.output_file, 'w') as f:
                 yaml.dump({'summary': parsed.get('summary', ''), 'labels': filtered_labels}, f, allow_unicode=True, default_flow_style=False)
+        if self.config.apply_labels and filtered_labels:
+            await asyncio.to_thread(pull_request.add_to_labels, *filtered_labels)
 
-        summary = Summary(analysis, jira_issues, self.config.jira_url, self.config.model)
+        summary = Summary(analysis, jira_issues, self.config.jira_url, self.config.model, metadata)
         new_body = str(summary) + self._extract_human_text(pull_request.body or '')
-        pull_request.edit(body=new_body)
+        if new_body != pull_request.body:
+            started = time.perf_counter()
+            await asyncio.to_thread(pull_request.edit, body=new_body)
+            log_duration('Updating PR body', started)
+        log_duration('PR summary generation', run_started)
 
         return summary
 
+    async def _generate(self, fetch: asyncio.Future, server_start: asyncio.Future) -> str:
+        """
+        Generate the summary with the model. The MCP server starts while GitHub data is fetched.
+        Args:
+            fetch (asyncio.Future): Future of `_fetch_github_data`.
+            server_start (asyncio.Future): Future of the running MCP server.
+        Returns:
+            str: Raw model output, YAML with the summary and labels.
+        """
+        started = time.perf_counter()
+        server = await server_start
+        log_duration('Waiting for MCP server', started)
+        started = time.perf_counter()
+        pull_request, changes, _, available_labels = await fetch
+        log_duration('Waiting for GitHub data after MCP server start', started)
+
+        started = time.perf_counter()
+        code_changes = await self._incremental_code_changes(pull_request)
+        if code_changes is None:
+            code_changes = await self._code_changes(changes)
+        full_prompt = self._build_prompt(changes, code_changes, available_labels)
+        log_duration('Building prompt', started)
+
+        agent = Agent(
+            name='PR Summary Agent',
+            instructions='You are a helpful assistant that generates pull request summaries.',
+            mcp_servers=[server],
+            model=self.config.model,
+        )
+        started = time.perf_counter()
+        result = await Runner.run(starting_agent=agent, input=full_prompt)
+        log_duration('Generating summary', started)
+        return result.final_output.strip()
+
+    def _get_pull_request(self):
+        """
+        Fetch the configured repository and pull request.
+        Returns:
+            tuple: PyGithub Repository and PullRequest objects.
+        """
+        # Lazy: only the URL of the repository is needed to fetch the PR
+        repository = self.config.github_client.withLazy(True).get_repo(self.config.repository)
+        # Objects of a lazy client are lazy too, `complete` fetches the PR right away
+        return repository, repository.get_pull(self.config.pr_number).complete()
+
+    async def _fetch_github_data(self, key_inputs: Optional[asyncio.Future] = None) -> tuple:
+        """
+        Fetch the pull request, then its files, commits and repository labels concurrently.
+        Paginated PyGithub requests are blocking, so each of them runs in a thread.
+        Args:
+            key_inputs (Optional[asyncio.Future]): Future resolved with the PullRequest, changes and
+                labels (the inputs of the summary cache key) as soon as they are fetched.
+        Returns:
+            tuple: PyGithub PullRequest, changes of its files, its commits, and taggable labels.
+        """
+        repository, pull_request = await run_in_thread('Fetching pull request', self._get_pull_request)
+        commits = asyncio.ensure_future(run_in_thread('Fetching commits', lambda: list(pull_request.get_commits())))
+        try:
+            fetch_changes = run_in_thread('Fetching changes', self._pull_request_changes, pull_request)
+            if self.config.available_labels is not None:
+                # Labels shared by the summaries of a batch
+                changes, available_labels = await fetch_changes, self.config.available_labels
+            else:
+                changes, available_labels = await asyncio.gather(
+                    fetch_changes,
+                    run_in_thread('Fetching labels', get_taggable_labels, repository),
+                )
+            if key_inputs is not None:
+                key_inputs.set_result((pull_request, changes, available_labels))
+            return pull_request, changes, await commits, available_labels
+        finally:
+            commits.cancel()
+
+    def _diff_providers(self, pull_request) -> List[DiffProvider]:
+        """
+        Return sources of changes to try, in order, according to `diff_source`.
+        Args:
+            pull_request: PyGithub PullRequest.
+        Returns:
+            List[DiffProvider]: Diff providers.
+        """
+        local = LocalGitDiffProvider(self.config.repo_path, pull_request.base.sha, pull_request.head.sha)
+        github = GithubDiffProvider(pull_request)
+        return {
+            'local': [local],
+            'github': [github],
+        }.get(self.config.diff_source, [local, github])
+
+    def _pull_request_changes(self, pull_request) -> List[FileChange]:
+        """
+        Fetch changes of the pull request files from the first diff provider which succeeds.
+        Args:
+            pull_request: PyGithub PullRequest.
+        Returns:
+            List[FileChange]: Changes of files.
+        Raises:
+            DiffError: If none of the providers succeeded.
+        """
+        providers = self._diff_providers(pull_request)
+        for provider in providers:
+            try:
+                changes = provider.pull_request_changes()
+            except DiffError as error:
+                if provider is providers[-1]:
+                    raise
+                logger.info('Fetching changes from %s failed, falling back: %s', provider.name, error)
+                continue
+            logger.info('Fetched changes of %d files from %s', len(changes), provider.name)
+            return changes
+
+    async def _incremental_code_changes(self, pull_request) -> Optional[str]:
+        """
+        Prepare code changes for an incremental summary: the previous summary from the PR body
+        and the changes between its head commit (stored in the body marker) and the current head.
+        Args:
+            pull_request: PyGithub PullRequest.
+        Returns:
+            str: Code changes to pass to the prompt, or None if the whole PR has to be summarized
+            (no previous summary, the head commit was force-pushed away, or too many files changed).
+        """
+        body = pull_request.body or ''
+        previous_sha = read_marker(body).get('head_sha')
+        previous_summary = extract_previous_summary(body)
+        if not self.config.incremental or not previous_sha or not previous_summary:
+            return None
+        if previous_sha == pull_request.head.sha:
+            return None
+        changes = await run_in_thread(
+            'Fetching changes since the previous summary',
+            self._changes_since,
+            pull_request,
+            previous_sha,
+        )
+        if changes is None:
+            return None
+        logger.info('Incremental summary: %d files changed since %s', len(changes), previous_sha)
+        return INCREMENTAL_CHANGES.format(
+            previous_summary=previous_summary,
+            code_changes=await self._code_changes(changes),
+        )
+
+    def _changes_since(self, pull_request, sha: str) -> Optional[List[FileChange]]:
+        """
+        Fetch the changes between the commit and the PR head from the first diff provider which can.
+        Args:
+            pull_request: PyGithub PullRequest.
+            sha (str): Commit to compare from.
+        Returns:
+            Optional[List[FileChange]]: Changes of files, or None if the head isn't a descendant of
+            the commit or the changes can't be fetched.
+        """
+        for provider in self._diff_providers(pull_request):
+            changes = provider.changes_since(sha)
+            if changes is not None:
+                return changes
+        return None
+
+    async def _code_changes(self, changes: List[FileChange]) -> str:
+        """
+        Prepare code changes for the prompt: patches packed into the token budget, or summaries of
+        chunks of the changes (see `_summarize_chunks`) if the patches don't fit the budget.
+        Args:
+            changes (List[FileChange]): Changes of the pull request files.
+        Returns:
+            str: Code changes to pass to the prompt.
+        """
+        # Limit code changes to avoid exceeding the model's context window
+        packed = pack_diff(changes, self.config.code_changes_token_budget)
+        logger.info(
+            'Packed code changes: ~%d tokens, %d files included, %d truncated, %d omitted, %d ignored',
+            packed.tokens,
+            len(packed.included_files),
+            len(packed.truncated_files),
+            len(packed.omitted_files),
+            len(packed.ignored_files),
+        )
+        cut = packed.truncated_files or packed.omitted_files
+        if self.config.map_reduce == 'always' or (self.config.map_reduce == 'auto' and cut):
+            return await self._summarize_chunks(changes)
+        return packed.text
+
+    async def _summarize_chunks(self, changes: List[FileChange]) -> str:
+        """
+        Map step of map-reduce summarization: summarize chunks of the changes (grouped by component)
+        concurrently, at most `map_concurrency` at a time. The summaries replace the code changes in
+        the OpenAI prompt, which merges them and chooses labels.
+        Args:
+            changes (List[FileChange]): Changes of the pull request files.
+        Returns:
+            str: Summaries of the chunks to pass to the prompt as code changes.
+        """
+        chunks = chunk_changes(changes, self.config.chunk_token_budget)
+        semaphore = asyncio.Semaphore(self.config.map_concurrency)
+        agent = Agent(
+            name='PR Chunk Summary Agent',
+            instructions='You are a helpful assistant that summarizes parts of large pull requests.',
+            model=self.config.model,
+        )
+
+        async def summarize(component: str, chunk: List[FileChange]) -> str:
+            async with semaphore:
+                started = time.perf_counter()
+                prompt = CHUNK_PROMPT.format(
+                    component=component,
+                    all_files='\n'.join(change.filename for change in chunk),
+                    code_changes=pack_diff(chunk, self.config.chunk_token_budget).text,
+                )
+                result = await Runner.run(starting_agent=agent, input=prompt)
+                log_duration(f'Summarizing changes of {component}', started)
+                return f'Changes of {component}:\n{result.final_output.strip()}'
+
+        started = time.perf_counter()
+        summaries = await asyncio.gather(*(summarize(component, chunk) for component, chunk in chunks))
+        log_duration(f'Summarizing {len(chunks)} chunks', started)
+        return (
+            'The pull request is too large to include all code changes, '
+            'these are summaries of the changes by component:\n\n' + '\n\n'.join(summaries)
+        )
+
+    def _build_prompt(self, changes: List[FileChange], code_changes: str, available_labels: List[str]) -> str:
+        """
+        Format the OpenAI prompt with the changed files and their patches.
+        Args:
+            changes (List[FileChange]): Changes of the pull request files.
+            code_changes (str): Code changes to include in the prompt.
+            available_labels (List[str]): Labels the model may choose from.
+        Returns:
+            str: Prompt passed to the model.
+        """
+        return self.config.openai_prompt.format(
+            all_files='\n'.join(change.filename for change in changes),
+            code_changes=code_changes,
+            available_labels=', '.join(available_labels),
+        )
+
     def _extract_human_text(self, body: str) -> str:
         """
         Extract human-written text from the PR body to preserve it.
@@ -214,6 +542,122 @@ def extract_jira_issues(commits: List[Commit]) -> Set[str]:
         issues.update(matches)
     return issues
 
+@dataclass
+class BatchResult:
+    """
+    Outcome of a summary in a batch.
+    Attributes:
+        pr_number (int): PR number.
+        status (str): "done" or "failed".
+        seconds (float): Duration of the summary, including retries.
+        attempts (int): Number of attempts.
+        error (Optional[str]): Error of the last attempt, if failed.
+    """
+    pr_number: int
+    status: str
+    seconds: float
+    attempts: int
+    error: Optional[str] = None
+
+def retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Return how long to wait before retrying after the error, if it's a GitHub or OpenAI rate limit error.
+    The reset time from response headers is used if available, otherwise the delay grows exponentially.
+    Args:
+        error (Exception): Error of the attempt.
+        attempt (int): Number of the attempt, starting from 1.
+    Returns:
+        Optional[float]: Delay in seconds, or None if the error is not a rate limit error.
+    """
+    if isinstance(error, GithubException):
+        if not isinstance(error, RateLimitExceededException) and error.status != 429:
+            return None
+        headers = error.headers or {}
+    elif isinstance(error, RateLimitError):
+        headers = error.response.headers
+    else:
+        return None
+    if headers.get('retry-after', '').isdigit():
+        delay = float(headers['retry-after'])
+    elif headers.get('x-ratelimit-remaining') == '0' and headers.get('x-ratelimit-reset', '').isdigit():
+        delay = float(headers['x-ratelimit-reset']) - time.time() + 1
+    else:
+        delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+    return min(max(delay, 1), MAX_RETRY_DELAY_SECONDS)
+
+def open_pull_request_numbers(repository) -> List[int]:
+    """Return numbers of open PRs of the repository, except drafts."""
+    return sorted(pull.number for pull in repository.get_pulls(state='open') if not pull.draft)
+
+async def run_batch(
+    config: AgentConfig,
+    pr_numbers: Optional[List[int]],
+    concurrency: int = 4,
+    max_retries: int = 3,
+) -> List[BatchResult]:
+    """
+    Generate summaries of several PRs, at most `concurrency` at the same time. The summaries share
+    the GitHub client, the taggable labels (fetched once) and the MCP git server. Summaries which
+    hit a GitHub or OpenAI rate limit are retried after a delay, other errors fail only their PR.
+    Args:
+        config (AgentConfig): Configuration object for the agents, `pr_number` is ignored.
+        pr_numbers (Optional[List[int]]): PR numbers, all open PRs except drafts if not set.
+        concurrency (int): Maximum number of summaries generated at the same time.
+        max_retries (int): Maximum number of retries of a summary after rate limit errors.
+    Returns:
+        List[BatchResult]: Outcomes of the summaries, in the order of `pr_numbers`.
+    """
+    repository = config.github_client.withLazy(True).get_repo(config.repository)
+    if pr_numbers is None:
+        pr_numbers = await run_in_thread('Fetching open pull requests', open_pull_request_numbers, repository)
+    config = replace(
+        config,
+        mcp_server=McpGitServer(config.repo_path),
+        available_labels=await run_in_thread('Fetching labels', get_taggable_labels, repository),
+        apply_labels=True,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize(pr_number: int) -> BatchResult:
+        current_pr_number.set(pr_number)
+        attempt = 1
+        while True:
+            async with semaphore:
+                if attempt == 1:
+                    started = time.perf_counter()
+                try:
+                    await PrSummaryAgent(replace(config, pr_number=pr_number)).run()
+                    return BatchResult(pr_number, 'done', time.perf_counter() - started, attempt)
+                except Exception as error:
+                    delay = retry_delay(error, attempt)
+                    if delay is None or attempt > max_retries:
+                        logger.error('Summary failed: %s: %s', type(error).__name__, error)
+                        return BatchResult(
+                            pr_number, 'failed', time.perf_counter() - started, attempt,
+                            f'{type(error).__name__}: {error}',
+                        )
+            # Other PRs of the batch use the slot during the delay
+            logger.warning('Rate limit exceeded, retrying in %.0fs', delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(summarize(pr_number) for pr_number in pr_numbers))
+    finally:
+        await config.mcp_server.close()
+    log_duration(f'Summarizing {len(pr_numbers)} pull requests', started)
+    return results
+
+def log_batch_report(results: List[BatchResult]) -> None:
+    """Log a table with the status and duration of every summary of the batch."""
+    logger.info('%-8s %-7s %8s %8s  %s', 'PR', 'Status', 'Attempts', 'Seconds', 'Error')
+    for result in results:
+        logger.info(
+            '%-8s %-7s %8d %8.2f  %s',
+            f'#{result.pr_number}', result.status, result.attempts, result.seconds, result.error or '',
+        )
+
 def main():
     """
     Main function that parses command line arguments and initiates PR summary generation.
@@ -229,20 +673,122 @@ def main():
         default='gpt-5',
         help='OpenAI model to use'
     )
-    parser.add_argument(
+    targets = parser.add_mutually_exclusive_group(required=True)
+    targets.add_argument(
         '--pr-number',
         type=int,
-        required=True,
         help='GitHub PR number'
     )
+    targets.add_argument(
+        '--pr-numbers',
+        type=int,
+        nargs='+',
+        help='Generate summaries of several PRs in one run, applying the chosen labels'
+    )
+    targets.add_argument(
+        '--all-open',
+        action='store_true',
+        help='Generate summaries of all open PRs except drafts in one run, applying the chosen labels'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Maximum number of PR summaries generated at the same time in batch mode'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=3,
+        help='Maximum number of retries of a PR summary after rate limit errors in batch mode'
+    )
+    parser.add_argument(
+        '--report-file',
+        default=None,
+        help='Path to write the JSON report with the status and duration of every PR summary in batch mode'
+    )
     parser.add_argument(
         '--output-file',
         default=None,
         help='Path to write raw AI YAML output'
     )
+    parser.add_argument(
+        '--token-budget',
+        type=int,
+        default=200000,
+        help='Maximum estimated number of tokens of code changes in the prompt'
+    )
+    parser.add_argument(
+        '--map-reduce',
+        choices=['auto', 'always', 'never'],
+        default='auto',
+        help='Summarize chunks of the changes by component first, "auto" does it if the changes exceed --token-budget'
+    )
+    parser.add_argument(
+        '--chunk-token-budget',
+        type=int,
+        default=50000,
+        help='Maximum estimated number of tokens of code changes of a chunk'
+    )
+    parser.add_argument(
+        '--map-concurrency',
+        type=int,
+        default=4,
+        help='Maximum number of chunks summarized at the same time'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Directory to cache summaries by the changes in (e.g. restored with actions/cache), '
+             'the key of the summary in the PR body is checked anyway'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always generate a new summary'
+    )
+    parser.add_argument(
+        '--http-cache-dir',
+        default=None,
+        help='Directory to cache GitHub API responses in (e.g. restored with actions/cache), '
+             'they are revalidated with conditional requests'
+    )
+    parser.add_argument(
+        '--http-cache-max-mb',
+        type=int,
+        default=50,
+        help='Maximum size of --http-cache-dir, the least recently used responses are evicted first'
+    )
+    parser.add_argument(
+        '--diff-source',
+        choices=['auto', 'local', 'github'],
+        default='auto',
+        help='Where to get the changes from: the local repository at REPO_PATH, the GitHub API, '
+             'or "auto" to try the local repository first'
+    )
+    parser.add_argument(
+        '--no-incremental',
+        action='store_true',
+        help='Summarize the whole PR diff instead of the changes since the previous summary'
+    )
     args = parser.parse_args()
+    batch = args.pr_number is None
+    if batch and args.output_file:
+        parser.error('--output-file is not supported in batch mode, labels are applied to PRs instead')
 
-    github_client = Github(auth=Auth.Token(os.environ['GITHUB_TOKEN']))
+    logging.basicConfig(level=logging.INFO, format='%(pr)s%(message)s')
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(PrNumberFilter())
+    http_cache = None
+    if args.http_cache_dir:
+        http_cache = HttpCache(args.http_cache_dir, args.http_cache_max_mb * 2 ** 20)
+        install_http_cache(http_cache)
+    # Set by GitHub Actions, differs from the default on GitHub Enterprise Server
+    github_client = Github(
+        base_url=os.environ.get('GITHUB_API_URL', Consts.DEFAULT_BASE_URL),
+        auth=Auth.Token(os.environ['GITHUB_TOKEN']),
+    )
+    cache = None if args.no_cache else SummaryCache(args.cache_dir)
 
     config = AgentConfig(
         github_client=github_client,
@@ -253,10 +799,38 @@ def main():
         repo_path=os.environ['REPO_PATH'],
         repository=os.environ['REPOSITORY'],
         output_file=args.output_file,
+        code_changes_token_budget=args.token_budget,
+        map_reduce=args.map_reduce,
+        chunk_token_budget=args.chunk_token_budget,
+        map_concurrency=args.map_concurrency,
+        cache=cache,
+        incremental=not args.no_incremental,
+        diff_source=args.diff_source,
     )
 
-    pr_agent = PrSummaryAgent(config)
-    asyncio.run(pr_agent.run())
+    if not batch:
+        try:
+            asyncio.run(PrSummaryAgent(config).run())
+        finally:
+            if http_cache:
+                http_cache.report()
+        if cache:
+            cache.write_github_output()
+        return
+
+    try:
+        results = asyncio.run(run_batch(config, args.pr_numbers, args.concurrency, args.max_retries))
+    finally:
+        if http_cache:
+            http_cache.report()
+    log_batch_report(results)
+    if args.report_file:
+        with open(args.report_file, 'w') as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+    if cache:
+        cache.write_github_output()
+    if any(result.status == 'failed' for result in results):
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
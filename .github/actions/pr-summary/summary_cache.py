@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import re
+from typing import List, Optional
+
+import yaml
+
+from diff_packing import FileChange, is_ignored
+
+# Changed when the way summaries are generated changes, to invalidate cached summaries
+CACHE_VERSION = 1
+
+# Hidden marker with metadata of the generated summary, placed on the "generated by" line of the PR body
+MARKER_PATTERN = re.compile(r'<!-- pr-summary: (\{.*?\}) -->')
+HUNK_RANGE_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@', re.MULTILINE)
+
+def normalize_patch(patch: Optional[str]) -> str:
+    """
+    Normalize the patch, so the same changes at shifted lines (e.g. after a rebase) are equal.
+    Args:
+        patch (Optional[str]): Unified diff of a file.
+    Returns:
+        str: Patch without line numbers in hunk headers.
+    """
+    return HUNK_RANGE_PATTERN.sub('@@', patch or '')
+
+def summary_cache_key(changes: List[FileChange], model: str, prompt: str, labels: List[str]) -> str:
+    """
+    Compute the cache key of a summary: a hash of everything the model output depends on.
+    Ignored files (README.md, CHANGELOG.md, lockfiles) are not part of the key, as the prompt
+    ignores them anyway.
+    Args:
+        changes (List[FileChange]): Changes of the pull request files.
+        model (str): Model name.
+        prompt (str): Prompt template.
+        labels (List[str]): Labels the model may choose from.
+    Returns:
+        str: Hex digest of the key.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([CACHE_VERSION, model, prompt, sorted(labels)]).encode())
+    for change in sorted(changes, key=lambda change: change.filename):
+        if is_ignored(change.filename):
+            continue
+        digest.update(json.dumps([change.filename, change.status, normalize_patch(change.patch)]).encode())
+    return digest.hexdigest()
+
+def read_marker(body: str) -> dict:
+    """
+    Read metadata of the previous summary from the hidden marker in the PR body.
+    Args:
+        body (str): PR body.
+    Returns:
+        dict: Metadata, empty if the body has no marker.
+    """
+    match = MARKER_PATTERN.search(body)
+    if not match:
+        return {}
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return {}
+
+def format_marker(metadata: dict) -> str:
+    """Return the hidden marker with metadata of the summary to place in the PR body."""
+    return f'<!-- pr-summary: {json.dumps(metadata, sort_keys=True)} -->'
+
+def extract_previous_summary(body: str) -> Optional[str]:
+    """
+    Extract the AI-generated analysis from the PR body: lines between the Task: line and the marker line.
+    Args:
+        body (str): PR body.
+    Returns:
+        Optional[str]: The analysis, or None if the body has no marker.
+    """
+    match = MARKER_PATTERN.search(body)
+    if not match:
+        return None
+    lines = body[:match.start()].splitlines()[:-1]
+    for index, line in enumerate(lines):
+        if line.startswith('Task:'):
+            lines = lines[index + 1:]
+            break
+    return '\n'.join(lines).strip() + '\n'
+
+class SummaryCache:
+    """
+    Cache of model outputs by `summary_cache_key`, with hit and miss counters.
+    Outputs are looked up in the directory (e.g. restored with actions/cache), then in the marker
+    of the PR body, which holds the key of the summary already in the body.
+    """
+    def __init__(self, directory: str = None):
+        """
+        Args:
+            directory (str): Directory with cached outputs, the body marker is used only if not set.
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.yaml')
+
+    def get(self, key: str, body: str = '') -> Optional[str]:
+        """
+        Return the cached model output (YAML with summary and labels) for the key.
+        Args:
+            key (str): Cache key.
+            body (str): PR body with the marker of the previous summary.
+        Returns:
+            Optional[str]: The cached output, or None on a miss.
+        """
+        if self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key)) as file:
+                self.hits += 1
+                return file.read()
+        if read_marker(body).get('cache_key') == key:
+            summary = extract_previous_summary(body)
+            if summary is not None:
+                self.hits += 1
+                # Labels were applied when the summary was generated
+                return yaml.safe_dump({'summary': summary, 'labels': []}, allow_unicode=True)
+        self.misses += 1
+        return None
+
+    def put(self, key: str, output: str) -> None:
+        """Store the model output for the key in the directory, if set."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key), 'w') as file:
+            file.write(output)
+
+    def write_github_output(self) -> None:
+        """Write hit and miss counters to the step output, if running in GitHub Actions."""
+        output_path = os.environ.get('GITHUB_OUTPUT')
+        if not output_path:
+            return
+        with open(output_path, 'a') as file:
+            file.write(f'cache-hits={self.hits}\ncache-misses={self.misses}\n')
@@ -1,17 +1,348 @@
 import argparse
 import json
+import os
 import jinja2
+import jinja2.meta
 
-parser = argparse.ArgumentParser()
-parser.add_argument('template_file', type=str, help='Path to the jinja2 template file')
-parser.add_argument('data_file', type=str, help='Path to the file with variables')
-parser.add_argument('output_file', type=str, help='Path to the generated output file')
+def create_environment(templates_dir: str, bytecode_cache_dir: str = None) -> jinja2.Environment:
+    """
+    Creates jinja2 environment loading templates from the directory
 
-args = parser.parse_args()
+    Args:
+        templates_dir (str): Directory with jinja2 templates
+        bytecode_cache_dir (str): Directory to store compiled templates between runs (e.g. restored by actions cache)
+    Returns:
+        jinja2.Environment: Environment to render the templates
+    """
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(templates_dir),
+        bytecode_cache=bytecode_cache,
+    )
 
-with open(args.data_file) as file:
-    data = json.load(file)
-with open(args.template_file) as file:
-    template = jinja2.Template(file.read())
-with open(args.output_file, "w") as file:
-    file.write(template.render(data))
+# Characters reserved in the size-bounded output for the footer about not shown findings
+FOOTER_RESERVE = 200
+
+class PageRows(list):
+    """
+    Rows of a results section which report rendering progress while the template iterates over them
+    """
+    def __init__(self, rows: list[any], section: str, progress: dict[str, any]):
+        super().__init__(rows)
+        self.section = section
+        self.progress = progress
+
+    def __iter__(self):
+        for index, row in enumerate(super().__iter__()):
+            # Output received so far contains all the previous rows, but nothing of this one
+            self.progress['current'] = self.progress['last'] = (self.section, index, self.progress['length'])
+            self.progress['rows'] += 1
+            yield row
+        self.progress['current'] = None
+        self.progress['finished'].add(self.section)
+
+def _page_data(data: dict[str, any], offsets: dict[str, int], progress: dict[str, any]) -> dict[str, any]:
+    """
+    Prepares data for a page: rows of every section start after the rows shown on previous pages
+    """
+    page_data = dict(data)
+    for section, value in data.items():
+        if isinstance(value, dict) and isinstance(value.get('rows'), list):
+            offset = offsets.get(section, 0)
+            page_data[section] = {
+                **value,
+                'rows': PageRows(value['rows'][offset:], section, progress),
+                'rowsOffset': offset,
+            }
+    return page_data
+
+def _rendered_sections(template: jinja2.Template, data: dict[str, any]) -> set[str]:
+    """
+    Returns names of the results sections with rows which the template refers to
+    (all of them if the template source is not available)
+    """
+    sections = {name for name, value in data.items() if isinstance(value, dict) and isinstance(value.get('rows'), list)}
+    environment = template.environment
+    if environment.loader is None or template.name is None:
+        return sections
+    source, _, _ = environment.loader.get_source(environment, template.name)
+    return sections & jinja2.meta.find_undeclared_variables(environment.parse(source))
+
+def render_bounded(template: jinja2.Template, data: dict[str, any], max_chars: int, max_pages: int = 1) -> list[str]:
+    """
+    Renders the template into pages of at most `max_chars` characters
+
+    The template output is streamed with `Template.generate()` and rendering stops as soon as the
+    budget is exceeded, so the whole output is never built in memory. The page is cut before the row
+    (an item of `rows` of a results section) being rendered, or before the last rendered row if the
+    budget is exceeded outside of rows (e.g. in a trailer after the rows), so rendered text is only
+    cut at row boundaries. Findings which didn't fit are rendered to the next page (the template gets
+    the remaining rows and their `rowsOffset`). The last page gets a "N more findings" footer instead,
+    counting the findings of all sections the template renders which were not shown.
+
+    Args:
+        template (jinja2.Template): Template to render
+        data (dict): Variables passed to the template
+        max_chars (int): Maximum number of characters of a page
+        max_pages (int): Maximum number of pages
+    Returns:
+        list: Rendered pages
+    """
+    budget = max_chars - FOOTER_RESERVE
+    sections = _rendered_sections(template, data)
+    pages = []
+    offsets = {}
+    while True:
+        progress = {'length': 0, 'current': None, 'last': None, 'rows': 0, 'finished': set()}
+        page_data = _page_data(data, offsets, progress)
+        chunks = []
+        for chunk in template.generate(page_data):
+            if progress['length'] + len(chunk) > budget:
+                break
+            chunks.append(chunk)
+            progress['length'] += len(chunk)
+        else:
+            pages.append(''.join(chunks))
+            return pages
+
+        text = ''.join(chunks)
+        cut = progress['current'] or progress['last']
+        if cut is None:
+            # Not even the text before the first row fits, nothing can be moved to the next page
+            remaining = sum(len(page_data[name]['rows']) for name in sections)
+            pages.append(text[:text.rfind('\n') + 1] + f'\n... {remaining} findings are not shown due to size limit\n')
+            return pages
+
+        section, index, length = cut
+        progress['finished'].discard(section)
+        # Rows of the cut section from the cut on, and all rows of the sections not rendered yet
+        remaining = sum(
+            len(page_data[name]['rows']) for name in sections | {section} if name not in progress['finished']
+        ) - index
+        text = text[:length]
+        # The cut row itself is not shown, at least one row must be shown to move the rest to the next page
+        if len(pages) + 1 < max_pages and progress['rows'] > 1:
+            pages.append(text + f'\n\n... {remaining} more findings are listed in the next part\n')
+            for finished in progress['finished']:
+                offsets[finished] = len(data[finished]['rows'])
+            offsets[section] = offsets.get(section, 0) + index
+            continue
+        pages.append(text + f'\n\n... and {remaining} more findings, which are not shown due to size limit\n')
+        return pages
+
+# Slack rejects messages with more than 50 blocks
+SLACK_MAX_BLOCKS = 50
+
+def limit_files(data: dict[str, any], sections: set[str], max_files: int) -> dict[str, any]:
+    """
+    Keeps rows of at most `max_files` files of the results sections
+
+    Sections share the files evenly, files which a section doesn't need are shared by the others.
+    Rows of trivy sections are sorted by severity, so the files with the most severe findings are kept.
+    The number of files which are not shown is set as `moreFiles` of every section.
+    """
+    names = {
+        section: list(dict.fromkeys(row['name'] for row in value['rows']))
+        for section, value in data.items() if section in sections
+    }
+    limited = dict(data)
+    left = max_files
+    for index, section in enumerate(sorted(names, key=lambda section: len(names[section]))):
+        shown = set(names[section][:left // (len(names) - index)])
+        left -= len(shown)
+        limited[section] = {
+            **data[section],
+            'rows': [row for row in data[section]['rows'] if row['name'] in shown],
+            'moreFiles': len(names[section]) - len(shown),
+        }
+    return limited
+
+def count_blocks(message: str) -> int:
+    """
+    Returns the number of blocks of a Slack message, including the blocks of its attachments
+    """
+    if not message.strip():
+        return 0
+    payload = json.loads(message)
+    return len(payload.get('blocks', [])) + sum(len(attachment.get('blocks', [])) for attachment in payload.get('attachments', []))
+
+def render_slack(template: jinja2.Template, data: dict[str, any], max_blocks: int = SLACK_MAX_BLOCKS) -> str:
+    """
+    Renders a Slack message of at most `max_blocks` blocks
+
+    The template renders a block per file, so it gets only the rows of the first files (see `limit_files`)
+    and the number of files which are not shown, for a "...and N more files" block. The number of files
+    starts at `max_blocks` and is lowered by the number of extra blocks until the message fits.
+
+    Args:
+        template (jinja2.Template): Template of the Slack message
+        data (dict): Variables passed to the template
+        max_blocks (int): Maximum number of blocks of the message
+    Returns:
+        str: Rendered message
+    Raises:
+        ValueError: If the message doesn't fit even without files
+    """
+    sections = _rendered_sections(template, data)
+    max_files = max_blocks
+    while True:
+        message = template.render(limit_files(data, sections, max_files))
+        extra = count_blocks(message) - max_blocks
+        if extra <= 0:
+            return message
+        if max_files == 0:
+            raise ValueError(f'{template.name} renders {extra} blocks over the limit of {max_blocks} without files')
+        max_files = max(max_files - extra, 0)
+
+def page_file_name(output_file: str, page: int) -> str:
+    """
+    Returns the file name of the page, e.g. `comment-2.md` for the second page of `comment.md`
+    """
+    if page == 1:
+        return output_file
+    root, extension = os.path.splitext(output_file)
+    return f'{root}-{page}{extension}'
+
+def render_templates(
+    environment: jinja2.Environment,
+    data: dict[str, any],
+    renders: list[tuple[str, str]],
+    paginated_renders: list[tuple[str, str]] = (),
+    max_chars: int = None,
+    max_pages: int = 1,
+    slack_renders: list[tuple[str, str]] = (),
+    max_blocks: int = SLACK_MAX_BLOCKS,
+) -> None:
+    """
+    Renders templates with the same data
+
+    Args:
+        environment (jinja2.Environment): Environment to load the templates from
+        data (dict): Variables passed to the templates
+        renders (list): Pairs of template name and path to the output file
+        paginated_renders (list): Pairs of template name and path to the output file,
+            which size is limited with `max_chars` (see `render_bounded`)
+        max_chars (int): Maximum number of characters of a paginated output file
+        max_pages (int): Maximum number of files of a paginated output, extra files are numbered
+        slack_renders (list): Pairs of Slack message template name and path to the output file,
+            which number of blocks is limited with `max_blocks` (see `render_slack`)
+        max_blocks (int): Maximum number of blocks of a Slack message
+    """
+    for template_name, output_file in renders:
+        template = environment.get_template(template_name)
+        with open(output_file, 'w') as file:
+            file.write(template.render(data))
+    for template_name, output_file in paginated_renders:
+        template = environment.get_template(template_name)
+        pages = render_bounded(template, data, max_chars, max_pages)
+        for page, text in enumerate(pages, start=1):
+            with open(page_file_name(output_file, page), 'w') as file:
+                file.write(text)
+    for template_name, output_file in slack_renders:
+        template = environment.get_template(template_name)
+        with open(output_file, 'w') as file:
+            file.write(render_slack(template, data, max_blocks))
+
+def parse_render(value: str) -> tuple[str, str]:
+    """
+    Parses the `template=output` value of the `--render` argument
+    """
+    template_name, separator, output_file = value.partition('=')
+    if not separator or not template_name or not output_file:
+        raise argparse.ArgumentTypeError(f"expected '<template>=<output>', got '{value}'")
+    return template_name, output_file
+
+def main():
+    """
+    Render jinja2 templates with variables from the json file
+
+    Either renders a single template passed as positional arguments, or loads the data
+    once and renders every `--render template=output` pair in the same process.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('template_file', type=str, nargs='?', help='Path to the jinja2 template file')
+    parser.add_argument('data_file', type=str, nargs='?', help='Path to the file with variables')
+    parser.add_argument('output_file', type=str, nargs='?', help='Path to the generated output file')
+    parser.add_argument('--data', type=str, help='Path to the file with variables (with --render)')
+    parser.add_argument(
+        '--templates-dir',
+        type=str,
+        default='templates',
+        help='Directory with templates referenced by --render (default: templates)',
+    )
+    parser.add_argument(
+        '--render',
+        type=parse_render,
+        action='append',
+        default=[],
+        metavar='TEMPLATE=OUTPUT',
+        help='Template name within --templates-dir and the output file, can be repeated. Replaces positional arguments',
+    )
+    parser.add_argument(
+        '--paginate',
+        type=parse_render,
+        action='append',
+        default=[],
+        metavar='TEMPLATE=OUTPUT',
+        help='Same as --render, but the output size is limited with --max-chars, can be repeated',
+    )
+    parser.add_argument(
+        '--max-chars',
+        type=int,
+        default=65000,
+        help='Maximum number of characters of a --paginate output (default: 65000, GitHub comments are limited to 65536)',
+    )
+    parser.add_argument(
+        '--max-pages',
+        type=int,
+        default=1,
+        help='Maximum number of files of a --paginate output, findings which do not fit are moved to '
+             'numbered files (e.g. comment-2.md). Findings which do not fit in the last one are counted in a footer',
+    )
+    parser.add_argument(
+        '--slack',
+        type=parse_render,
+        action='append',
+        default=[],
+        metavar='TEMPLATE=OUTPUT',
+        help='Same as --render for a Slack message template, files which do not fit in --max-blocks '
+             'are counted in a "...and N more files" block, can be repeated',
+    )
+    parser.add_argument(
+        '--max-blocks',
+        type=int,
+        default=SLACK_MAX_BLOCKS,
+        help=f'Maximum number of blocks of a --slack output (default: {SLACK_MAX_BLOCKS}, the Slack limit)',
+    )
+    parser.add_argument(
+        '--bytecode-cache',
+        type=str,
+        help='Directory to cache compiled templates between runs',
+    )
+
+    args = parser.parse_args()
+
+    if args.render or args.paginate or args.slack:
+        if not args.data:
+            parser.error('--data is required with --render, --paginate and --slack')
+        data_file, templates_dir, renders = args.data, args.templates_dir, args.render
+    else:
+        if not (args.template_file and args.data_file and args.output_file):
+            parser.error('template_file, data_file and output_file are required without --render')
+        data_file = args.data_file
+        templates_dir = os.path.dirname(os.path.abspath(args.template_file))
+        renders = [(os.path.basename(args.template_file), args.output_file)]
+
+    with open(data_file) as file:
+        data = json.load(file)
+
+    environment = create_environment(templates_dir, args.bytecode_cache)
+    render_templates(
+        environment, data, renders, args.paginate, args.max_chars, args.max_pages, args.slack, args.max_blocks,
+    )
+
+if __name__ == '__main__':
+    main()
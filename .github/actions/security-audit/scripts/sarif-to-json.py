@@ -4,6 +4,13 @@ import os
 import re
 import collections
 import dataclasses
+import itertools
+import multiprocessing
+import sys
+from typing import Iterator, TextIO
+
+# Severity levels of Trivy findings from the most to the least severe
+SEVERITY_ORDER = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'UNKNOWN')
 
 @dataclasses.dataclass
 class BaseInfo:
@@ -83,6 +90,72 @@ def strip_tags(text: str) -> str:
     text = re.sub(r'<\s*/?\s*p[^>]*>', '', text)
     return text.replace('\n', ' ').replace('\r', '')
 
+# Fields of Trivy result messages with their default values, e.g.
+#   Package: micromatch
+#   Installed Version: 3.1.10
+#   Vulnerability CVE-2024-4067
+#   Severity: MEDIUM
+#   Fixed Version: 4.0.8
+TRIVY_MESSAGE_FIELDS = (
+    ('Severity', 'Severity: ', 'UNKNOWN'),
+    ('Package', 'Package: ', ''),
+    ('Installed Version', 'Installed Version: ', ''),
+    ('Fixed Version', 'Fixed Version: ', ''),
+)
+
+# The last result with parsed message fields and the fields, see `trivy_message_fields`
+_last_message = {'item': None, 'fields': None}
+
+def parse_trivy_message(text: str) -> dict[str, str]:
+    """
+    Extracts severity, package, installed and fixed versions from a Trivy result message
+
+    Every field is cut with `str.partition`, which is cheaper than a regular expression or `str.split` on short messages.
+    Missing fields (e.g. there is no fixed version for a vulnerability yet) get default values.
+    If a field occurs several times (e.g. inside a matched secret), the first occurrence is used.
+
+    Args:
+        text (str): Text of the result message
+    Returns:
+        dict: Field values by field names ('Severity', 'Package', 'Installed Version', 'Fixed Version')
+    """
+    fields = {}
+    for name, prefix, default in TRIVY_MESSAGE_FIELDS:
+        _, found, rest = text.partition(prefix)
+        fields[name] = rest.partition('\n')[0].strip() if found else default
+    return fields
+
+def trivy_message_fields(item: dict[str, any]) -> dict[str, str]:
+    """
+    Returns the fields of the result message (see `parse_trivy_message`)
+
+    The result filter parses the message right before the converter gets the result, so the fields
+    of the last parsed result are kept and every message is parsed once. The result itself is not modified.
+    """
+    if _last_message['item'] is not item:
+        _last_message['item'] = item
+        _last_message['fields'] = parse_trivy_message(item['message']['text'])
+    return _last_message['fields']
+
+def vulnerability_rule(rules: dict[str, dict], cache: dict[str, dict | None], rule_id: str) -> dict[str, str] | None:
+    """
+    Returns the description of the vulnerability rule, extracting it on the first request
+
+    Args:
+        rules (dict): SARIF rules by IDs
+        cache (dict): Extracted rule descriptions by rule IDs (modified in place)
+        rule_id (str): Rule ID of a scan result
+    Returns:
+        dict: Rule description, or None if the rule is not a vulnerability rule (e.g. a secret)
+    """
+    if rule_id not in cache:
+        rule = rules.get(rule_id)
+        if rule and 'vulnerability' in rule['properties']['tags']:
+            cache[rule_id] = {'description': strip_tags(rule['fullDescription']['text'].rstrip())}
+        else:
+            cache[rule_id] = None
+    return cache[rule_id]
+
 def convert_trivy_results_to_json(run: dict[str, any]) -> dict[str, any]:
     """
     This function processes SARIF scan results and returns a dictionary
@@ -98,18 +171,13 @@ def convert_trivy_results_to_json(run: dict[str, any]) -> dict[str, any]:
             }
     """
     secrets = collections.defaultdict(list)
-    vulnerability_rules = collections.defaultdict(list)
     vulnerabilities = collections.defaultdict(list)
 
-    # Preprocess rules to extract vulnerability descriptions.
-    # This allows us to later supplement scan results by matching rule ID → description.
-    for rule in run['tool']['driver']['rules']:
-        rule_id = rule['id']
-        if 'vulnerability' in rule['properties']['tags']:
-            description = strip_tags(rule['fullDescription']['text'].rstrip())
-            vulnerability_rules[rule_id] = {
-                'description': description,
-            }
+    # Index rules to supplement scan results by matching rule ID → description.
+    # Descriptions are extracted only for the rules referenced by results (see `vulnerability_rule`),
+    # as filtered results of a large scan reference a small part of its rules.
+    rules = {rule['id']: rule for rule in run['tool']['driver']['rules']}
+    vulnerability_rules = {}
 
     # Extract the following data from scan results:
     #   file name, start and end line numbers (to generate precise links to the content), and severity level.
@@ -117,7 +185,7 @@ def convert_trivy_results_to_json(run: dict[str, any]) -> dict[str, any]:
     #   package name, installed and fixed versions, rule description.
     for item in run['results']:
         base_info = extract_base_info(item)
-        # To specify the error type, need to convert the `severity` variable.
+        # To specify the error type, need to extract the `severity` field.
         # From:
         #   Artifact: app/config.yaml
         #   Type: Secret GitHub Fine-grained personal access tokens
@@ -128,21 +196,20 @@ def convert_trivy_results_to_json(run: dict[str, any]) -> dict[str, any]:
         #   token-2: *****
         # To:
         #   CRITICAL
-        severity = item['message']['text'].split('Severity: ')[1].split('\n')[0].strip()
+        fields = trivy_message_fields(item)
         default = {
             'name': base_info.file_name,
             'startLine': base_info.start_line,
             'endLine': base_info.end_line,
             'ruleId': item['ruleId'],
-            'severity': severity,
+            'severity': fields['Severity'],
         }
-        rule = vulnerability_rules.get(item['ruleId'])
+        rule = vulnerability_rule(rules, vulnerability_rules, item['ruleId'])
         if rule:
-            text = item['message']['text']
             vulnerabilities[base_info.file_name].append({
-                'package': text.split('Package: ')[1].split('\n')[0].strip(),
-                'installedVersion': text.split('Installed Version: ')[1].split('\n')[0].strip(),
-                'fixedVersion':  text.split('Fixed Version: ')[1].split('\n')[0].strip(),
+                'package': fields['Package'],
+                'installedVersion': fields['Installed Version'],
+                'fixedVersion': fields['Fixed Version'],
                 'description': rule.get('description'),
                 **default,
             })
@@ -161,6 +228,665 @@ def convert_trivy_results_to_json(run: dict[str, any]) -> dict[str, any]:
         },
     }
 
+class JsonStream:
+    """
+    Minimal incremental JSON reader over a text file.
+
+    Only the structure needed to walk SARIF files is exposed: objects are iterated
+    key by key and arrays item by item, while every nested value is decoded with
+    `json.JSONDecoder.raw_decode`. Memory usage is bounded by the largest single
+    value read at once (e.g. one scan result), not by the size of the whole file.
+    """
+    chunk_size = 1 << 16
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self, size: int) -> bool:
+        """
+        Appends the next chunk of the file to the buffer, dropping the consumed part
+
+        Args:
+            size (int): Number of characters to read
+        Returns:
+            bool: False when the end of the file is reached
+        """
+        if self.eof:
+            return False
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """
+        Skips whitespace and returns the next significant character ('' at the end of file)
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read_more(self.chunk_size):
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f'Invalid JSON: expected {char!r} at position {self.pos}')
+        self.pos += 1
+
+    def read_value(self) -> any:
+        """
+        Decodes the next complete JSON value
+
+        The buffer grows geometrically until the value fits, so decoding a large
+        value (e.g. the `tool` section with every rule) stays linear in its size.
+        """
+        self._peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer may be cut in the middle
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more(size)
+            size *= 2
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        Iterates over the keys of the next JSON object
+
+        The caller must consume the value (with `read_value` or a nested
+        `iter_object`/`iter_array`) before advancing to the next key.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            if self._peek() == ',':
+                self.pos += 1
+                continue
+            self._expect('}')
+            return
+
+    def iter_array(self) -> Iterator[None]:
+        """
+        Iterates over the items of the next JSON array without decoding them
+
+        The caller must consume every item before advancing to the next one.
+        """
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self._peek() == ',':
+                self.pos += 1
+                continue
+            self._expect(']')
+            return
+
+    def iter_array_values(self) -> Iterator[any]:
+        """
+        Iterates over the decoded items of the next JSON array
+        """
+        for _ in self.iter_array():
+            yield self.read_value()
+
+def _stream_run_results(stream: JsonStream, run: dict[str, any], keys: Iterator[str]) -> Iterator[dict[str, any]]:
+    """
+    Yields results of the run one by one and then reads the rest of the run object
+    """
+    yield from stream.iter_array_values()
+    for key in keys:
+        run[key] = stream.read_value()
+
+def _stream_run(stream: JsonStream) -> dict[str, any]:
+    """
+    Reads a single SARIF run leaving `results` as a lazy iterator when possible
+
+    Trivy and gitleaks write `tool` before `results`, so rules are known before the
+    first result is decoded. If a file has them in the opposite order, results of
+    that run are loaded into memory as the converters need rules first.
+    """
+    run = {}
+    keys = stream.iter_object()
+    for key in keys:
+        if key != 'results':
+            run[key] = stream.read_value()
+        elif 'tool' in run:
+            run['results'] = _stream_run_results(stream, run, keys)
+            return run
+        else:
+            run['results'] = list(stream.iter_array_values())
+    run.setdefault('results', [])
+    return run
+
+def iter_sarif_runs(file: TextIO) -> Iterator[dict[str, any]]:
+    """
+    Incrementally reads SARIF runs from a file
+
+    Every yielded run contains fully decoded `tool` data, while `results` is an
+    iterator decoding scan results one at a time. Results must be consumed before
+    requesting the next run (unconsumed results are skipped).
+
+    Args:
+        file (TextIO): Opened SARIF file
+    Returns:
+        Iterator[dict]: Data of the 'run' fields from SARIF file
+    """
+    stream = JsonStream(file)
+    for key in stream.iter_object():
+        if key != 'runs':
+            stream.read_value()
+            continue
+        for _ in stream.iter_array():
+            run = _stream_run(stream)
+            yield run
+            for _ in run['results']:
+                pass
+
+CONVERTERS = {
+    'trivy': convert_trivy_results_to_json,
+    'gitleaks': convert_gitleaks_results_to_json,
+}
+
+def merge_results(result: dict[str, any], other: dict[str, any]) -> dict[str, any]:
+    """
+    Merges conversion results of another run (or file) into the result
+
+    Findings of the same file are combined, gitleaks findings of the same lines
+    get their commits combined, and totals are recalculated. Sections which are
+    missing in the result (including non-scan data like `github`) are copied as is.
+
+    Args:
+        result (dict): Conversion results to merge into (modified in place)
+        other (dict): Conversion results to be merged
+    Returns:
+        dict: Merged conversion results
+    """
+    for section, data in other.items():
+        target = result.get(section)
+        if target is None:
+            result[section] = data
+            continue
+        # Keep details of the run which actually found something in this section
+        if 'details' in data and not target['files'] and data['files']:
+            target['details'] = data['details']
+        for file_name, findings in data['files'].items():
+            if isinstance(findings, list):
+                target['files'].setdefault(file_name, []).extend(findings)
+                continue
+            file_findings = target['files'].setdefault(file_name, {})
+            for file_key, finding in findings.items():
+                if file_key in file_findings:
+                    file_findings[file_key]['commits'].extend(finding['commits'])
+                else:
+                    file_findings[file_key] = finding
+        target['files'] = asc_sort_dict_by_keys(target['files'])
+        target['totalFiles'] = len(target['files'])
+        if 'uniqueFileNames' in target:
+            target['uniqueFileNames'] = sorted([os.path.basename(file_name) for file_name in target['files']])
+    return result
+
+# Number of results converted by a worker process at once
+PARALLEL_CHUNK_SIZE = 10000
+
+# Data shared by all chunks of a run, set once per worker process by `_init_worker`
+_worker_state = {}
+
+def _init_worker(tool: dict[str, any], check_type: str) -> None:
+    _worker_state['tool'] = tool
+    _worker_state['check_type'] = check_type
+
+def _convert_chunk(results: list[dict[str, any]]) -> dict[str, any]:
+    """
+    Converts a chunk of run results in a worker process
+
+    `details` are replaced with None to avoid sending the whole `tool` back to the main process.
+    """
+    run = {'tool': _worker_state['tool'], 'results': results}
+    result = CONVERTERS[_worker_state['check_type']](run)
+    for data in result.values():
+        if 'details' in data:
+            data['details'] = None
+    return result
+
+def _iter_chunks(results: Iterator[dict[str, any]], size: int) -> Iterator[list[dict[str, any]]]:
+    results = iter(results)
+    while chunk := list(itertools.islice(results, size)):
+        yield chunk
+
+def convert_run_parallel(run: dict[str, any], check_type: str, jobs: int) -> dict[str, any]:
+    """
+    Converts results of the run in several worker processes
+
+    Results are split into contiguous chunks, and conversion results of the chunks are
+    merged in the original order, so the output is identical to the serial conversion.
+
+    Args:
+        run (dict): Data of the 'run' field from SARIF file
+        check_type (str): Check type (trivy, gitleaks)
+        jobs (int): Number of worker processes
+    Returns:
+        dict: A JSON object containing the conversion results
+    """
+    result = {}
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(run['tool'], check_type)) as pool:
+        for chunk_result in pool.imap(_convert_chunk, _iter_chunks(run['results'], PARALLEL_CHUNK_SIZE)):
+            merge_results(result, chunk_result)
+    for data in result.values():
+        if 'details' in data:
+            data['details'] = run['tool']
+    return result
+
+class PathIndex:
+    """
+    Set of file paths, e.g. files changed by a PR
+
+    Paths ending with '/' match every file in the directory. A path is looked up
+    together with its parent directories, so a lookup costs a few set checks
+    regardless of the number of indexed paths.
+    """
+    def __init__(self, paths: Iterator[str]):
+        self.files = set()
+        self.directories = set()
+        for path in paths:
+            path = normalize_path(path.strip())
+            if not path:
+                continue
+            if path.endswith('/'):
+                self.directories.add(path.rstrip('/'))
+            else:
+                self.files.add(path)
+
+    def __len__(self) -> int:
+        return len(self.files) + len(self.directories)
+
+    def __contains__(self, path: str) -> bool:
+        path = normalize_path(path)
+        if path in self.files:
+            return True
+        while '/' in path:
+            path = path.rsplit('/', 1)[0]
+            if path in self.directories:
+                return True
+        return False
+
+def normalize_path(path: str) -> str:
+    """
+    Removes the leading './' from the path, so paths from git and SARIF files are comparable
+    """
+    return path[2:] if path.startswith('./') else path
+
+def load_path_index(paths_file: str) -> PathIndex:
+    """
+    Reads paths from the file (one per line, e.g. `git diff --name-only` output), '-' to read stdin
+    """
+    if paths_file == '-':
+        return PathIndex(sys.stdin)
+    with open(paths_file, 'r', encoding='utf-8') as file:
+        return PathIndex(file)
+
+def make_result_filter(check_type: str, min_severity: str | None = None, paths: PathIndex | None = None) -> callable:
+    """
+    Builds a predicate of raw SARIF results, applied before the results are converted
+
+    The file path is checked first as it's the cheapest check, the severity is parsed from
+    the result message only for results in the indexed paths. Gitleaks results have no severity,
+    so `min_severity` applies to Trivy results only.
+
+    Args:
+        check_type (str): Check type (trivy, gitleaks)
+        min_severity (str | None): The least severe level of results to keep (one of `SEVERITY_ORDER`)
+        paths (PathIndex | None): Paths of results to keep
+    Returns:
+        callable: Function of a SARIF result returning True for the results to keep, None if all results are kept
+    """
+    max_rank = None
+    if min_severity and check_type == 'trivy':
+        max_rank = SEVERITY_ORDER.index(min_severity)
+    if max_rank is None and paths is None:
+        return None
+    severity_rank = {severity: rank for rank, severity in enumerate(SEVERITY_ORDER)}
+
+    def predicate(item: dict[str, any]) -> bool:
+        if paths is not None:
+            file_name = item['locations'][0]['physicalLocation']['artifactLocation']['uri']
+            if file_name not in paths:
+                return False
+        if max_rank is not None:
+            severity = trivy_message_fields(item)['Severity']
+            if severity_rank.get(severity, len(SEVERITY_ORDER) - 1) > max_rank:
+                return False
+        return True
+
+    return predicate
+
+def convert_sarif_file(
+    input_file: str,
+    check_type: str,
+    stream: bool = False,
+    jobs: int = 1,
+    result_filter: callable = None,
+) -> dict[str, any]:
+    """
+    Converts every run of the SARIF file into json format
+
+    Args:
+        input_file (str): Path to the SARIF file
+        check_type (str): Check type (trivy, gitleaks)
+        stream (bool): Parse the file incrementally instead of loading it as a whole
+        jobs (int): Number of worker processes converting results of a run
+        result_filter (callable): Predicate of raw SARIF results to convert (see `make_result_filter`),
+            runs without matching results are skipped as if they had no results
+    Returns:
+        dict: Merged conversion results of all runs, empty if there are no scan results
+    """
+    result = {}
+    with open(input_file, 'r', encoding='utf-8') as file:
+        runs = iter_sarif_runs(file) if stream else json.load(file)['runs']
+        for run in runs:
+            # Results may be a lazy iterator, so check emptiness by taking the first item
+            results = iter(run['results'])
+            if result_filter:
+                results = filter(result_filter, results)
+            first_result = next(results, None)
+            if first_result is None:
+                continue
+            run['results'] = itertools.chain([first_result], results)
+            if jobs > 1:
+                merge_results(result, convert_run_parallel(run, check_type, jobs))
+            else:
+                merge_results(result, CONVERTERS[check_type](run))
+    return result
+
+# Sections of conversion results which contain scan findings
+SCAN_SECTIONS = ('vulnerabilities', 'trivy', 'gitleaks')
+
+def iter_findings(files: dict[str, any]) -> Iterator[tuple[str, dict[str, any]]]:
+    """
+    Iterates over findings of the `files` field of a results section
+
+    Trivy sections store a list of findings per file, gitleaks stores findings by lines key.
+
+    Args:
+        files (dict): Findings grouped by file names
+    Returns:
+        Iterator[tuple]: Pairs of file name and finding
+    """
+    for file_name, findings in files.items():
+        for finding in (findings.values() if isinstance(findings, dict) else findings):
+            yield file_name, finding
+
+def filter_findings(files: dict[str, any], predicate: callable) -> dict[str, any]:
+    """
+    Keeps the findings matching the predicate, preserving the structure of the `files` field
+
+    Args:
+        files (dict): Findings grouped by file names
+        predicate (callable): Function of file name and finding returning True for the findings to keep
+    Returns:
+        dict: Filtered findings grouped by file names, files without findings are removed
+    """
+    filtered = {}
+    for file_name, findings in files.items():
+        if isinstance(findings, dict):
+            kept = {key: finding for key, finding in findings.items() if predicate(file_name, finding)}
+        else:
+            kept = [finding for finding in findings if predicate(file_name, finding)]
+        if kept:
+            filtered[file_name] = kept
+    return filtered
+
+def finding_fingerprint(section: str, file_name: str, finding: dict[str, any]) -> tuple:
+    """
+    Returns a key identifying the finding between scans of different commits
+    """
+    return (
+        section,
+        finding['ruleId'],
+        file_name,
+        finding['startLine'],
+        finding['endLine'],
+        finding.get('package', ''),
+    )
+
+def apply_baseline(result: dict[str, any], baseline: dict[str, any]) -> dict[str, any]:
+    """
+    Leaves only findings which are not present in the baseline scan
+
+    Findings are matched by `finding_fingerprint`. Numbers of new, fixed (present only in
+    the baseline) and unchanged findings, and the fixed findings grouped by file names
+    are stored in the `baseline` section:
+        {
+            'baseline': {
+                'vulnerabilities': {'new': 1, 'fixed': 2, 'unchanged': 10, 'fixedFiles': {...}},
+                ...
+            }
+        }
+
+    Args:
+        result (dict): Conversion results (modified in place)
+        baseline (dict): Conversion results of the base branch scan (both default and compact formats)
+    Returns:
+        dict: Conversion results with new findings only
+    """
+    summary = {}
+    for section in SCAN_SECTIONS:
+        current = result.get(section)
+        previous = baseline.get(section)
+        if current is None and previous is None:
+            continue
+        current_files = current['files'] if current else {}
+        previous_files = previous['files'] if previous else {}
+        current_index = {finding_fingerprint(section, *item) for item in iter_findings(current_files)}
+        baseline_index = {finding_fingerprint(section, *item) for item in iter_findings(previous_files)}
+
+        new_files = filter_findings(
+            current_files,
+            lambda file_name, finding: finding_fingerprint(section, file_name, finding) not in baseline_index,
+        )
+        fixed_files = filter_findings(
+            previous_files,
+            lambda file_name, finding: finding_fingerprint(section, file_name, finding) not in current_index,
+        )
+        new_count = sum(1 for _ in iter_findings(new_files))
+        summary[section] = {
+            'new': new_count,
+            'fixed': sum(1 for _ in iter_findings(fixed_files)),
+            'unchanged': sum(1 for _ in iter_findings(current_files)) - new_count,
+            'fixedFiles': fixed_files,
+        }
+        if current:
+            current['files'] = new_files
+            current['totalFiles'] = len(new_files)
+            if 'uniqueFileNames' in current:
+                current['uniqueFileNames'] = sorted([os.path.basename(file_name) for file_name in new_files])
+    result['baseline'] = summary
+    return result
+
+def filter_baseline(baseline: dict[str, any], min_severity: str | None = None, paths: PathIndex | None = None) -> dict[str, any]:
+    """
+    Applies `--min-severity` and `--only-paths` filters to the baseline findings,
+    so findings skipped in the current scan are not reported as fixed
+
+    Args:
+        baseline (dict): Conversion results of the base branch scan (modified in place)
+        min_severity (str | None): The least severe level of Trivy findings to keep
+        paths (PathIndex | None): Paths of findings to keep
+    Returns:
+        dict: Filtered baseline
+    """
+    severity_rank = {severity: rank for rank, severity in enumerate(SEVERITY_ORDER)}
+    max_rank = SEVERITY_ORDER.index(min_severity) if min_severity else len(SEVERITY_ORDER)
+
+    def predicate(file_name: str, finding: dict[str, any]) -> bool:
+        if paths is not None and file_name not in paths:
+            return False
+        # Gitleaks findings have no severity
+        severity = finding.get('severity')
+        return severity is None or severity_rank.get(severity, len(SEVERITY_ORDER) - 1) <= max_rank
+
+    for section in SCAN_SECTIONS:
+        if baseline.get(section):
+            baseline[section]['files'] = filter_findings(baseline[section]['files'], predicate)
+    return baseline
+
+def add_render_views(result: dict[str, any]) -> dict[str, any]:
+    """
+    Replaces findings grouped by files with precomputed data, so templates render them in a single loop
+
+    Every section gets:
+        rows: flat list of findings sorted by severity (most severe first, for trivy sections) and file name,
+            it replaces the `files` field, so every finding is written once (see `findings_by_file`)
+        fileCounts: number of findings per file name
+    Trivy sections additionally get:
+        severityCounts: number of findings per severity level, in `SEVERITY_ORDER`
+
+    Args:
+        result (dict): Conversion results (modified in place)
+    Returns:
+        dict: Conversion results with render views
+    """
+    severity_rank = {severity: rank for rank, severity in enumerate(SEVERITY_ORDER)}
+    for section in SCAN_SECTIONS:
+        data = result.get(section)
+        if not data:
+            continue
+        # Files are sorted by names already, so a stable sort by severity keeps them grouped by files
+        rows = [finding for _, finding in iter_findings(data.pop('files'))]
+        data['fileCounts'] = asc_sort_dict_by_keys(collections.Counter(finding['name'] for finding in rows))
+        if section != 'gitleaks':
+            rows.sort(key=lambda finding: severity_rank.get(finding['severity'], len(SEVERITY_ORDER)))
+            counts = collections.Counter(finding['severity'] for finding in rows)
+            data['severityCounts'] = {
+                severity: counts[severity]
+                for severity in sorted(counts, key=lambda severity: severity_rank.get(severity, len(SEVERITY_ORDER)))
+            }
+        data['rows'] = rows
+    return result
+
+def findings_by_file(section: str, data: dict[str, any]) -> dict[str, any]:
+    """
+    Returns findings of a results section grouped by file names, rebuilding them from `rows`
+    if the section was written with render views (see `add_render_views`)
+
+    Args:
+        section (str): Name of the results section
+        data (dict): Results section
+    Returns:
+        dict: Findings in the format of the `files` field
+    """
+    if 'files' in data:
+        return data['files']
+    files = {}
+    for finding in data.get('rows', []):
+        if section == 'gitleaks':
+            files.setdefault(finding['name'], {})[f"{finding['startLine']}-{finding['endLine']}"] = finding
+        else:
+            files.setdefault(finding['name'], []).append(finding)
+    return asc_sort_dict_by_keys(files)
+
+def load_results(input_file: str) -> dict[str, any]:
+    """
+    Loads conversion results written by `write_results` (e.g. the baseline), with findings grouped by files
+
+    Args:
+        input_file (str): Path to the json file
+    Returns:
+        dict: Conversion results without render views
+    """
+    with open(input_file, 'r', encoding='utf-8') as file:
+        result = json.load(file)
+    for section in SCAN_SECTIONS:
+        data = result.get(section)
+        if data:
+            data['files'] = findings_by_file(section, data)
+            data.pop('rows', None)
+            data.pop('fileCounts', None)
+            data.pop('severityCounts', None)
+    return result
+
+def _trim_details(details: dict[str, any] | None, rule_ids: set[str]) -> dict[str, any] | None:
+    """
+    Keeps only the driver name and version, and the rules with the specified IDs
+    """
+    if details is None:
+        return None
+    driver = details['driver']
+    trimmed = {key: driver[key] for key in ('name', 'fullName', 'version') if key in driver}
+    if rule_ids:
+        trimmed['rules'] = [rule for rule in driver.get('rules', []) if rule['id'] in rule_ids]
+    return {'driver': trimmed}
+
+def compact_results(result: dict[str, any]) -> dict[str, any]:
+    """
+    Removes duplicated data from conversion results
+
+    Vulnerability descriptions are moved from every finding into the `rules` table
+    (`rules[ruleId].description`), `vulnerabilities.details` keeps only driver info and
+    `trivy.details` keeps only the rules of found secrets (the only part rendered by templates).
+
+    Args:
+        result (dict): Conversion results (modified in place)
+    Returns:
+        dict: Compacted conversion results
+    """
+    rules = result.get('rules', {})
+    vulnerabilities = result.get('vulnerabilities')
+    if vulnerabilities:
+        for _, finding in iter_findings(findings_by_file('vulnerabilities', vulnerabilities)):
+            if 'description' in finding:
+                rules.setdefault(finding['ruleId'], {'description': finding.pop('description')})
+        vulnerabilities['details'] = _trim_details(vulnerabilities['details'], set())
+    trivy = result.get('trivy')
+    if trivy:
+        rule_ids = {finding['ruleId'] for _, finding in iter_findings(findings_by_file('trivy', trivy))}
+        trivy['details'] = _trim_details(trivy['details'], rule_ids)
+    if rules:
+        result['rules'] = rules
+    return result
+
+def write_results(result: dict[str, any], output_file: str, compact: bool = False) -> None:
+    """
+    Writes conversion results to the json file
+
+    Args:
+        result (dict): Conversion results
+        output_file (str): Path to the output json file
+        compact (bool): Remove duplicated data (see `compact_results`) and write minified json
+    """
+    with open(output_file, 'w', encoding='utf-8') as file:
+        if compact:
+            json.dump(compact_results(result), file, separators=(',', ':'))
+        else:
+            json.dump(result, file, indent=2)
+
+def parse_input(value: str) -> tuple[str, str]:
+    """
+    Parses the `check_type=path` value of the `--input` argument
+    """
+    check_type, separator, input_file = value.partition('=')
+    if not separator or check_type not in CONVERTERS or not input_file:
+        raise argparse.ArgumentTypeError(f"expected '<{'|'.join(CONVERTERS)}>=<path>', got '{value}'")
+    return check_type, input_file
+
 def main():
     """
     Convert sarif file with check results to json file
@@ -169,27 +895,104 @@ def main():
     extracts the necessary information and converts it into the output json file
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument('input_file', type=str, help='Path to the SARIF file to be converted')
-    parser.add_argument('output_file', type=str, help='Path to the JSON file where the conversion result will be saved')
-    parser.add_argument('check_type', type=str, choices=['trivy', 'gitleaks'], help='Check type (trivy, gitleaks)')
+    parser.add_argument('input_file', type=str, nargs='?', help='Path to the SARIF file to be converted')
+    parser.add_argument('output_file', type=str, nargs='?', help='Path to the JSON file where the conversion result will be saved')
+    parser.add_argument('check_type', type=str, nargs='?', choices=list(CONVERTERS), help='Check type (trivy, gitleaks)')
+    parser.add_argument(
+        '--input',
+        type=parse_input,
+        action='append',
+        default=[],
+        metavar='CHECK_TYPE=PATH',
+        help='SARIF file with its check type, can be repeated. Replaces positional arguments',
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Path to the JSON file where results of all --input files are merged. '
+             'If the file exists, its content (e.g. github data) is preserved',
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Parse the SARIF file incrementally to keep memory usage bounded on large scan results',
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of worker processes converting scan results (the output is the same for any value)',
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Store vulnerability descriptions once in the `rules` table, trim `details` and minify the output',
+    )
+    parser.add_argument(
+        '--render-views',
+        action='store_true',
+        help='Replace findings grouped by files with a flat list of rows and counts per severity and file '
+             '(the format of the action templates), see `add_render_views`',
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        help='Path to the JSON file with conversion results of the base branch scan. '
+             'Only findings missing in it are written, along with new/fixed/unchanged stats. Ignored if the file does not exist',
+    )
+    parser.add_argument(
+        '--min-severity',
+        type=str,
+        choices=SEVERITY_ORDER,
+        help='Skip Trivy results less severe than the level before they are converted',
+    )
+    parser.add_argument(
+        '--only-paths',
+        type=str,
+        metavar='FILE_LIST',
+        help="Path to a file with paths (one per line, '-' for stdin, directories end with '/'), "
+             'e.g. files changed by a PR. Results in other files are skipped before they are converted',
+    )
 
     args = parser.parse_args()
 
-    with open(args.input_file, 'r', encoding='utf-8') as file:
-        sarif_data = json.load(file)
-
-    run = sarif_data['runs'][0]
+    paths = load_path_index(args.only_paths) if args.only_paths else None
+    filters = {
+        check_type: make_result_filter(check_type, args.min_severity, paths)
+        for check_type in CONVERTERS
+    }
 
-    if not run['results']:
-        return
+    if args.input:
+        if not args.output:
+            parser.error('--output is required with --input')
+        result = {}
+        if os.path.exists(args.output):
+            result = load_results(args.output)
+        for check_type, input_file in args.input:
+            # Nothing can match an empty list of paths, so the files are not even read
+            if paths is not None and not paths:
+                break
+            merge_results(result, convert_sarif_file(input_file, check_type, args.stream, args.jobs, filters[check_type]))
+        output_file = args.output
+    else:
+        if not (args.input_file and args.output_file and args.check_type):
+            parser.error('input_file, output_file and check_type are required without --input')
+        result = {}
+        if paths is None or paths:
+            result = convert_sarif_file(args.input_file, args.check_type, args.stream, args.jobs, filters[args.check_type])
+        if not result:
+            return
+        output_file = args.output_file
 
-    if args.check_type == 'trivy':
-        result = convert_trivy_results_to_json(run)
-    elif args.check_type == 'gitleaks':
-        result = convert_gitleaks_results_to_json(run)
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = load_results(args.baseline)
+        if args.min_severity or paths is not None:
+            filter_baseline(baseline, args.min_severity, paths)
+        apply_baseline(result, baseline)
 
-    with open(args.output_file, 'w', encoding='utf-8') as file:
-        json.dump(result, file, indent=2)
+    if args.render_views:
+        add_render_views(result)
+    write_results(result, output_file, args.compact)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,9 @@
+"""
+Benchmarks for the Python scripts used by the actions of this repository.
+
+Run them from the repository root, e.g. `python -m benchmarks.sarif_streaming`.
+`python -m benchmarks.suite --output results.json` times every stage of all scripts
+with peak memory (and optional cProfile stats) and writes the results as JSON.
+`python -m benchmarks.pr_summary_e2e` runs pr-summary end to end offline, against local
+stand-ins of the GitHub API, the OpenAI API and the MCP git server, and reports the latency of every phase.
+"""
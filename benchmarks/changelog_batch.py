@@ -0,0 +1,95 @@
+"""
+Compares adding PR entries to the changelog one by one (as the action does once per PR)
+with adding them in one pass with `changelog.py --entries`.
+
+    python -m benchmarks.changelog_batch --days 2000 --entries 1000
+
+With `--processes` the per-PR loop starts `changelog.py` once per PR, which includes
+the interpreter startup; otherwise it calls `changelog_add_entry()` in this process.
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import common, fixtures
+
+REPOSITORY = 'owner/repo'
+
+def entry_pr_number(index: int, last_pr_number: int) -> int:
+    """
+    Returns the PR number of a new entry, every tenth one duplicates a PR listed in the changelog
+    or the previous entry of the batch
+    """
+    if index % 20 == 9:
+        return last_pr_number - index
+    if index % 20 == 19:
+        return last_pr_number + index
+    return last_pr_number + index + 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=2000, help='Number of date sections in the changelog')
+    parser.add_argument('--entries', type=int, default=1000, help='Number of PR entries to add')
+    parser.add_argument('--processes', action='store_true', help='Start changelog.py once per PR in the loop')
+    args = parser.parse_args()
+
+    changelog = common.load_script(common.CHANGELOG)
+    with tempfile.TemporaryDirectory() as directory:
+        loop_file = os.path.join(directory, 'loop.md')
+        batch_file = os.path.join(directory, 'batch.md')
+        with open(loop_file, 'w') as file:
+            last_pr_number = fixtures.write_changelog(file, args.days, repository=REPOSITORY)
+        with open(loop_file) as source, open(batch_file, 'w') as target:
+            target.write(source.read())
+        entries = [
+            {
+                'pr_number': entry_pr_number(index, last_pr_number),
+                'title': f'Change #{index}',
+                'environment': f'[{fixtures.ENVIRONMENTS[index % 3]}]',
+                'date': time.strftime('%Y-%m-%d'),
+            }
+            for index in range(args.entries)
+        ]
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for entry in entries:
+                if args.processes:
+                    subprocess.run(
+                        [
+                            sys.executable, str(common.CHANGELOG),
+                            '--repository', REPOSITORY,
+                            '--pr-number', str(entry['pr_number']),
+                            '--pr-title', entry['title'],
+                            '--environment', entry['environment'][1:-1],
+                            '--changelog-path', loop_file,
+                        ],
+                        check=True,
+                        stdout=subprocess.DEVNULL,
+                    )
+                else:
+                    changelog.changelog_add_entry(
+                        loop_file, entry['pr_number'], entry['title'], entry['environment'], REPOSITORY, False,
+                    )
+        loop_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            added = changelog.changelog_add_entries(batch_file, entries, REPOSITORY, False)
+        batch_seconds = time.perf_counter() - started
+
+        size = os.path.getsize(batch_file) / 2**20
+        print(f'changelog: {args.days} days, {size:.2f} MB, {added} of {len(entries)} entries added')
+        print(f'{"per-PR loop":>12}: {loop_seconds:8.3f} s')
+        print(f'{"batch":>12}: {batch_seconds:8.3f} s ({loop_seconds / batch_seconds:.0f}x)')
+        if not filecmp.cmp(loop_file, batch_file, shallow=False):
+            sys.exit('Error: the per-PR loop and the batch produced different changelogs')
+
+if __name__ == '__main__':
+    main()
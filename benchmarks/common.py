@@ -0,0 +1,34 @@
+import importlib.util
+import pathlib
+import sys
+from types import ModuleType
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+ACTIONS = ROOT / '.github' / 'actions'
+SARIF_TO_JSON = ACTIONS / 'security-audit' / 'scripts' / 'sarif-to-json.py'
+SECURITY_AUDIT_TEMPLATES = ACTIONS / 'security-audit' / 'templates'
+CHANGELOG = ACTIONS / 'add-changelog-entry' / 'scripts' / 'changelog.py'
+PR_SUMMARY = ACTIONS / 'pr-summary' / 'pr-summary-generator.py'
+GENERATE_MESSAGE = ACTIONS / 'security-audit' / 'scripts' / 'generate-message.py'
+
+def load_script(path: pathlib.Path) -> ModuleType:
+    """
+    Imports an action script by path (script names contain dashes, so they can't be imported directly)
+
+    The script directory is added to `sys.path`, as if the script was run, so it can import its modules.
+
+    Args:
+        path (Path): Path to the script
+    Returns:
+        ModuleType: Loaded module
+    """
+    name = path.stem.replace('-', '_')
+    if name in sys.modules:
+        return sys.modules[name]
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,181 @@
+"""
+Checks the local git diff of pr-summary against a real temporary git repository, including the
+fallback to the GitHub API, and reports the latency of the diff:
+
+    changes     a pull request with modified, added, removed and renamed files, a path with spaces
+                and non-ASCII characters, and a binary file: paths, statuses and line counts of
+                `LocalGitDiffProvider` must match `git diff -z --name-status` and `--numstat`
+    fallback    a shallow clone lacks the base commit: with `diff-source: auto` the changes come from
+                the GitHub API (a fake pull request serving the files), with `local` the diff fails
+    stderr      a git stand-in writing more than a pipe buffer to stderr must not block the diff
+
+    python -m benchmarks.diff_sources --pr-files 1000 --repeat 5
+"""
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from benchmarks import common
+from benchmarks.pr_summary_e2e import make_git_repo
+
+GIT_STATUSES = {'A': 'added', 'M': 'modified', 'D': 'removed', 'R': 'renamed'}
+
+def git(path: pathlib.Path, *args: str) -> str:
+    environment = {
+        **os.environ,
+        'GIT_AUTHOR_NAME': 'Developer', 'GIT_AUTHOR_EMAIL': 'developer@example.com',
+        'GIT_COMMITTER_NAME': 'Developer', 'GIT_COMMITTER_EMAIL': 'developer@example.com',
+    }
+    completed = subprocess.run(['git', '-C', str(path), *args], env=environment, check=True, capture_output=True, text=True)
+    return completed.stdout
+
+def add_edge_cases(path: pathlib.Path) -> str:
+    """
+    Commits a rename with changes, a removal, a path with spaces and non-ASCII characters and a binary file
+
+    Returns:
+        str: The new head commit SHA
+    """
+    tracked = sorted(git(path, 'ls-files').splitlines())
+    renamed, removed = tracked[0], tracked[1]
+    lines = (path / renamed).read_text().splitlines(keepends=True)
+    lines[0] = 'renamed = True\n'
+    (path / renamed).unlink()
+    (path / 'moved').mkdir(exist_ok=True)
+    (path / 'moved' / pathlib.Path(renamed).name).write_text(''.join(lines))
+    (path / removed).unlink()
+    (path / 'docs with spaces').mkdir(exist_ok=True)
+    (path / 'docs with spaces' / 'résumé.md').write_text('# Résumé\n\nNon-ASCII path\n')
+    (path / 'logo.png').write_bytes(bytes(range(256)) * 4)
+    git(path, 'add', '-A')
+    git(path, 'commit', '-q', '-m', 'ABC-100 Move, remove and add edge case files')
+    return git(path, 'rev-parse', 'HEAD').strip()
+
+def expected_changes(path: pathlib.Path, revisions: str) -> dict[str, tuple[str, int, int]]:
+    """
+    Returns status, additions and deletions by file name, parsed from the `-z` output of git
+    independently of `parse_git_diff`
+    """
+    statuses = {}
+    fields = git(path, 'diff', '-z', '--find-renames', '--name-status', revisions).split('\0')
+    index = 0
+    while index < len(fields) - 1:
+        status = fields[index][0]
+        # Renames are followed by the old and the new path
+        index += 2 if status == 'R' else 1
+        statuses[fields[index]] = GIT_STATUSES[status]
+        index += 1
+    counts = {}
+    fields = git(path, 'diff', '-z', '--find-renames', '--numstat', revisions).split('\0')
+    index = 0
+    while index < len(fields) - 1:
+        added, deleted, file_name = fields[index].split('\t')
+        if not file_name:
+            # Renames have an empty path, followed by the old and the new path
+            file_name = fields[index + 2]
+            index += 2
+        counts[file_name] = (int(added) if added != '-' else 0, int(deleted) if deleted != '-' else 0)
+        index += 1
+    return {file_name: (status, *counts[file_name]) for file_name, status in statuses.items()}
+
+def check_changes(diff_provider, repo_path: pathlib.Path, base_sha: str, head_sha: str) -> None:
+    changes = diff_provider.LocalGitDiffProvider(str(repo_path), base_sha, head_sha).pull_request_changes()
+    actual = {change.filename: (change.status, change.additions, change.deletions) for change in changes}
+    expected = expected_changes(repo_path, f'{base_sha}...{head_sha}')
+    assert actual == expected, {
+        file_name: (actual.get(file_name), expected.get(file_name))
+        for file_name in actual.keys() | expected.keys() if actual.get(file_name) != expected.get(file_name)
+    }
+    patches = {change.filename: change.patch for change in changes}
+    assert patches['logo.png'] is None, 'binary files have no patch'
+    assert all(patch is None or patch.startswith('@@') for patch in patches.values()), 'patches start with a hunk'
+    print(f'changes   ok: {len(changes)} files, statuses {sorted({status for status, _, _ in actual.values()})}')
+
+def check_fallback(generator, diff_provider, repo_path: pathlib.Path, base_sha: str, head_sha: str, tmp_path: pathlib.Path) -> None:
+    shallow_path = tmp_path / 'shallow'
+    subprocess.run(
+        ['git', 'clone', '-q', '--depth', '1', '--branch', 'feature/e2e', repo_path.as_uri(), str(shallow_path)],
+        check=True, capture_output=True,
+    )
+    # Files of the pull request as the GitHub API would list them
+    api_files = [
+        SimpleNamespace(**vars(change))
+        for change in diff_provider.LocalGitDiffProvider(str(repo_path), base_sha, head_sha).pull_request_changes()
+    ]
+    pull_request = SimpleNamespace(
+        base=SimpleNamespace(sha=base_sha),
+        head=SimpleNamespace(sha=head_sha),
+        get_files=lambda: iter(api_files),
+    )
+
+    def agent(diff_source: str):
+        config = generator.AgentConfig(
+            github_client=None, jira_url='', model='', openai_prompt='', pr_number=1,
+            repo_path=str(shallow_path), repository='owner/repo', diff_source=diff_source,
+        )
+        return generator.PrSummaryAgent(config)
+
+    changes = agent('auto')._pull_request_changes(pull_request)
+    assert [vars(change) for change in changes] == [vars(file) for file in api_files], 'auto falls back to the GitHub API'
+    try:
+        agent('local')._pull_request_changes(pull_request)
+    except diff_provider.DiffError as error:
+        assert base_sha in str(error), error
+    else:
+        raise AssertionError('local diff of a shallow clone must fail')
+    print(f'fallback  ok: {len(changes)} files from the GitHub API, local diff failed')
+
+def check_stderr(diff_provider, tmp_path: pathlib.Path) -> None:
+    diff = '1\t0\tREADME.md\n\ndiff --git a/README.md b/README.md\n--- a/README.md\n+++ b/README.md\n@@ -0,0 +1 @@\n+text\n'
+    script = tmp_path / 'noisy_git.py'
+    script.write_text(
+        'import sys\n'
+        f'sys.stderr.write("warning: noise\\n" * {1 << 16})\n'
+        'sys.stderr.flush()\n'
+        f'sys.stdout.write({diff!r})\n'
+    )
+    provider = diff_provider.LocalGitDiffProvider(str(tmp_path), 'base', 'head')
+    provider._git = lambda *args: [sys.executable, str(script)]
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(changes=provider.pull_request_changes()), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), 'git diff with a large stderr output blocked'
+    assert [change.filename for change in result['changes']] == ['README.md'], result
+    print(f'stderr    ok: {len("warning: noise") * (1 << 16) // 1024} KB of stderr')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pr-files', type=int, default=200, help='Number of files changed by the pull request')
+    parser.add_argument('--pr-commits', type=int, default=5, help='Number of commits of the pull request')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed diffs')
+    args = parser.parse_args()
+
+    generator = common.load_script(common.PR_SUMMARY)
+    diff_provider = common.load_script(common.PR_SUMMARY.parent / 'diff_provider.py')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = pathlib.Path(tmp_dir)
+        repo_path = tmp_path / 'repo'
+        base_sha, _ = make_git_repo(repo_path, args.pr_files, args.pr_commits)
+        head_sha = add_edge_cases(repo_path)
+
+        check_changes(diff_provider, repo_path, base_sha, head_sha)
+        check_fallback(generator, diff_provider, repo_path, base_sha, head_sha, tmp_path)
+        check_stderr(diff_provider, tmp_path)
+
+        provider = diff_provider.LocalGitDiffProvider(str(repo_path), base_sha, head_sha)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            provider.pull_request_changes()
+            timings.append(time.perf_counter() - started)
+        print(f'latency     : best {min(timings):.3f}s, mean {sum(timings) / len(timings):.3f}s of git diff')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+import datetime
+import json
+import random
+from typing import TextIO
+
+SEVERITIES = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+SECRET_RULES = ['github-pat', 'github-fine-grained-pat', 'slack-web-hook', 'aws-access-key-id', 'private-key']
+PACKAGES = ['micromatch', 'lodash', 'axios', 'requests', 'django', 'urllib3', 'jinja2', 'express']
+
+def _vulnerability_rule(rule_id: str, package: str, severity: str) -> dict:
+    description = (
+        f'<p>The package `{package}` is vulnerable to Regular Expression Denial of Service (ReDoS).</p>\n'
+        'By passing a malicious payload, the pattern matching will keep backtracking to the input.'
+    )
+    return {
+        'id': rule_id,
+        'name': 'LanguageSpecificPackageVulnerability',
+        'shortDescription': {'text': f'{package}: vulnerable to Regular Expression Denial of Service'},
+        'fullDescription': {'text': description},
+        'defaultConfiguration': {'level': 'warning'},
+        'helpUri': f'https://avd.aquasec.com/nvd/{rule_id.lower()}',
+        'help': {'text': f'Vulnerability {rule_id}\nSeverity: {severity}\nPackage: {package}\n{description}'},
+        'properties': {'precision': 'very-high', 'security-severity': '7.5', 'tags': ['vulnerability', 'security', severity]},
+    }
+
+def _secret_rule(rule_id: str, severity: str) -> dict:
+    return {
+        'id': rule_id,
+        'name': 'Secret',
+        'shortDescription': {'text': rule_id.replace('-', ' ').title()},
+        'fullDescription': {'text': '  token: ****************************************'},
+        'defaultConfiguration': {'level': 'error'},
+        'helpUri': 'https://github.com/aquasecurity/trivy/blob/main/pkg/fanal/secret/builtin-rules.go',
+        'help': {'text': f'Secret {rule_id}\nSeverity: {severity}\nMatch:   token: ****'},
+        'properties': {'precision': 'very-high', 'security-severity': '9.5', 'tags': ['secret', 'security', severity]},
+    }
+
+def _location(file_name: str, start_line: int, end_line: int) -> list[dict]:
+    return [{
+        'physicalLocation': {
+            'artifactLocation': {'uri': file_name, 'uriBaseId': 'ROOTPATH'},
+            'region': {'startLine': start_line, 'startColumn': 1, 'endLine': end_line, 'endColumn': 1},
+        },
+        'message': {'text': file_name},
+    }]
+
+def trivy_message(rule_id: str, package: str, installed: str, fixed: str, severity: str) -> str:
+    """
+    Builds a Trivy vulnerability result message in the format of the SARIF output
+    """
+    return (
+        f'Package: {package}\nInstalled Version: {installed}\nVulnerability {rule_id}\n'
+        f'Severity: {severity}\nFixed Version: {fixed}\n'
+        f'Link: [{rule_id}](https://avd.aquasec.com/nvd/{rule_id.lower()})'
+    )
+
+def write_trivy_sarif(file: TextIO, results_count: int, rules_count: int = 500, files_count: int = 2000, seed: int = 0) -> None:
+    """
+    Writes a synthetic Trivy SARIF file with mixed vulnerability and secret results
+
+    Results are written one by one, so files with millions of results can be
+    generated without holding them in memory. The output is deterministic for a given seed.
+
+    Args:
+        file (TextIO): Opened output file
+        results_count (int): Number of results to generate
+        rules_count (int): Number of vulnerability rules
+        files_count (int): Number of distinct scanned files
+        seed (int): Random seed
+    """
+    rng = random.Random(seed)
+    vulnerabilities = [
+        (f'CVE-2024-{index:05d}', PACKAGES[index % len(PACKAGES)], SEVERITIES[index % len(SEVERITIES)])
+        for index in range(rules_count)
+    ]
+    rules = [_vulnerability_rule(*vulnerability) for vulnerability in vulnerabilities]
+    rules += [_secret_rule(rule_id, 'CRITICAL') for rule_id in SECRET_RULES]
+    tool = {
+        'driver': {
+            'fullName': 'Trivy Vulnerability Scanner',
+            'informationUri': 'https://github.com/aquasecurity/trivy',
+            'name': 'Trivy',
+            'rules': rules,
+            'version': '0.69.2',
+        },
+    }
+    file.write('{"version": "2.1.0", "runs": [{"tool": ')
+    json.dump(tool, file)
+    file.write(', "results": [')
+    for index in range(results_count):
+        file_name = f'src/module_{rng.randrange(files_count)}/package-lock.json'
+        start_line = rng.randrange(1, 5000)
+        if rng.random() < 0.9:
+            rule_index = rng.randrange(rules_count)
+            rule_id, package, severity = vulnerabilities[rule_index]
+            text = trivy_message(rule_id, package, f'1.{rng.randrange(20)}.0', f'2.{rng.randrange(20)}.1', severity)
+        else:
+            rule_id = rng.choice(SECRET_RULES)
+            rule_index = rules_count + SECRET_RULES.index(rule_id)
+            text = f'Artifact: {file_name}\nType: \nSecret {rule_id}\nSeverity: CRITICAL\nMatch:   token: ****'
+        result = {
+            'ruleId': rule_id,
+            'ruleIndex': rule_index,
+            'level': 'error',
+            'message': {'text': text},
+            'locations': _location(file_name, start_line, start_line + rng.randrange(30)),
+        }
+        if index:
+            file.write(', ')
+        json.dump(result, file)
+    file.write('], "columnKind": "utf16CodeUnits", "originalUriBaseIds": {"ROOTPATH": {"uri": "file:///github/workspace/"}}}]}')
+
+def write_gitleaks_sarif(file: TextIO, results_count: int, files_count: int = 2000, seed: int = 0) -> None:
+    """
+    Writes a synthetic gitleaks SARIF file
+
+    Args:
+        file (TextIO): Opened output file
+        results_count (int): Number of results to generate
+        files_count (int): Number of distinct files with leaks
+        seed (int): Random seed
+    """
+    rng = random.Random(seed)
+    tool = {
+        'driver': {
+            'name': 'gitleaks',
+            'semanticVersion': 'v8.0.0',
+            'rules': [{'id': rule_id, 'name': rule_id, 'shortDescription': {'text': '(?s).+'}} for rule_id in SECRET_RULES],
+        },
+    }
+    file.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", "runs": [{"tool": ')
+    json.dump(tool, file)
+    file.write(', "results": [')
+    for index in range(results_count):
+        file_name = f'app/config_{rng.randrange(files_count)}.yaml'
+        start_line = rng.randrange(1, 500)
+        commit_sha = f'{rng.getrandbits(160):040x}'
+        rule_id = rng.choice(SECRET_RULES)
+        result = {
+            'message': {'text': f'{rule_id} has detected secret for file {file_name} at commit {commit_sha}.'},
+            'ruleId': rule_id,
+            'locations': _location(file_name, start_line, start_line),
+            'partialFingerprints': {
+                'commitSha': commit_sha,
+                'email': 'developer@example.com',
+                'author': 'Developer',
+                'date': '2024-07-05T06:48:12Z',
+                'commitMessage': 'Update config',
+            },
+        }
+        if index:
+            file.write(', ')
+        json.dump(result, file)
+    file.write(']}]}')
+
+ENVIRONMENTS = ['dev', 'staging', 'prod']
+
+def write_changelog(file: TextIO, days_count: int, entries_per_day: int = 5, repository: str = 'owner/repo', seed: int = 0) -> int:
+    """
+    Writes a synthetic CHANGELOG.md in the format of the add-changelog-entry action
+
+    Date sections go back from yesterday, so entries added today go on top of the file.
+
+    Args:
+        file (TextIO): Opened output file
+        days_count (int): Number of date sections
+        entries_per_day (int): Number of PR entries in a date section
+        repository (str): Repository of PR links
+        seed (int): Random seed
+    Returns:
+        int: The largest PR number in the changelog
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    pr_number = days_count * entries_per_day
+    file.write('# Changelog\n\n')
+    for day in range(1, days_count + 1):
+        file.write(f'## {today - datetime.timedelta(days=day)}\n\n')
+        environments = {}
+        for _ in range(entries_per_day):
+            environments.setdefault(rng.choice(ENVIRONMENTS), []).append(pr_number)
+            pr_number -= 1
+        for environment, pr_numbers in environments.items():
+            file.write(f'[{environment}]\n\n')
+            for number in pr_numbers:
+                file.write(f'- [associated PR](https://github.com/{repository}/pull/{number})\n')
+                file.write(f'- Update {rng.choice(PACKAGES)} to fix issue #{number}\n')
+            file.write('\n')
+    return days_count * entries_per_day
+
+# Paths of changed files by kind, with the share of files of the kind in a PR
+PR_FILE_KINDS = [
+    ('stacks/apps/{component}/src/module_{index}.py', 0.5),
+    ('stacks/apps/{component}/tests/test_module_{index}.py', 0.2),
+    ('envs/{environment}/{component}_{index}.tf', 0.15),
+    ('docs/{component}_{index}.md', 0.1),
+    ('stacks/apps/{component}/package-lock.json', 0.05),
+]
+COMPONENTS = ['api', 'frontend', 'worker', 'scheduler', 'billing', 'auth']
+
+def make_pr_files(files_count: int, hunks_per_file: int = 4, lines_per_hunk: int = 12, seed: int = 0) -> list[dict]:
+    """
+    Builds synthetic changes of PR files in the format of the GitHub pull request files API
+
+    Files are code, tests, Terraform configs, docs and lockfiles of several components.
+    Lockfile patches are ten times larger, like real dependency updates.
+
+    Args:
+        files_count (int): Number of changed files
+        hunks_per_file (int): Number of hunks of a patch
+        lines_per_hunk (int): Number of changed lines of a hunk
+        seed (int): Random seed
+    Returns:
+        list[dict]: Changes with 'filename', 'status', 'patch', 'additions' and 'deletions' keys
+    """
+    rng = random.Random(seed)
+    patterns, weights = zip(*PR_FILE_KINDS)
+    files = []
+    for index in range(files_count):
+        filename = rng.choices(patterns, weights)[0].format(
+            component=rng.choice(COMPONENTS),
+            environment=rng.choice(ENVIRONMENTS),
+            index=index,
+        )
+        scale = 10 if filename.endswith('.json') else 1
+        hunks = []
+        additions = deletions = 0
+        line = 1
+        for _ in range(hunks_per_file * scale):
+            line += rng.randrange(10, 200)
+            added = rng.randrange(1, lines_per_hunk)
+            deleted = lines_per_hunk - added
+            hunks.append(
+                f'@@ -{line},{deleted + 3} +{line},{added + 3} @@ def function_{line}():\n'
+                '     context = load_context()\n'
+                + ''.join(f'-    value_{line}_{n} = compute({n})\n' for n in range(deleted))
+                + ''.join(f'+    value_{line}_{n} = compute({n}, {rng.choice(PACKAGES)!r})\n' for n in range(added))
+                + '     return context\n'
+            )
+            additions += added
+            deletions += deleted
+        files.append({
+            'filename': filename,
+            'status': rng.choice(['modified'] * 8 + ['added', 'removed']),
+            'patch': ''.join(hunks).rstrip('\n'),
+            'additions': additions,
+            'deletions': deletions,
+        })
+    return files
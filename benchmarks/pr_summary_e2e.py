@@ -0,0 +1,492 @@
+"""
+Runs pr-summary-generator.py end to end without network access and reports the latency of
+every phase, so changes of the action can be compared under the same conditions:
+
+    GitHub      a local fake of the REST API serves the pull request, its files, commits and
+                labels (paginated, with ETags) and accepts the body update, each request takes
+                `--github-latency` seconds
+    OpenAI      a local stub of the Responses API answers with a fixed summary after
+                `--model-latency` seconds
+    MCP server  a stub `mcp-server-git` with a single tool, put first on the PATH
+    REPO_PATH   a temporary git repository with the base and head commits of the pull request
+
+The generator runs like in the action, in a subprocess with the environment of the action step,
+and its "<phase> took <seconds>s" log lines are collected: fetching the pull request, changes,
+commits and labels, building the prompt, starting the MCP server, generating the summary and
+updating the PR body (the phases overlap, see `PrSummaryAgent.run`). "wall" is the time of the
+subprocess, including the interpreter start and imports. The PR body is reset before every run,
+so every run summarizes the whole pull request unless `--keep-body` is set. Arguments after `--`
+are passed to the generator.
+
+    python -m benchmarks.pr_summary_e2e --runs 5 --model-latency 2 --github-latency 0.05
+    python -m benchmarks.pr_summary_e2e --diff-source github --http-cache --output e2e.json
+    python -m benchmarks.pr_summary_e2e --keep-body -- --no-incremental
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+from benchmarks import common, fixtures, suite
+
+REPOSITORY = 'owner/repo'
+PR_NUMBER = 1
+PR_BODY = 'Task: ABC-1\n\nNotes of the author, kept below the summary.\n'
+LABELS = (
+    [f'c/{component}' for component in fixtures.COMPONENTS]
+    + [f'env={environment}' for environment in fixtures.ENVIRONMENTS]
+    + ['bug', 'documentation', 'p/high', 'p/low']
+)
+MODEL_OUTPUT = (
+    'summary: |\n'
+    '  ### Summary\n'
+    '  Stub summary of the pull request.\n'
+    'labels:\n'
+    '  - c/api\n'
+    '  - env=dev\n'
+)
+MCP_SERVER_STUB = '''#!{python}
+"""Stand-in of mcp-server-git with a single tool, started with the same arguments."""
+import subprocess
+import sys
+
+try:
+    from mcp.server.mcpserver import MCPServer
+except ImportError:
+    from mcp.server.fastmcp import FastMCP as MCPServer
+
+repository = sys.argv[sys.argv.index('--repository') + 1]
+server = MCPServer('mcp-git')
+
+@server.tool()
+def git_status(repo_path: str) -> str:
+    """Shows the working tree status"""
+    return subprocess.run(['git', '-C', repository, 'status'], capture_output=True, text=True).stdout
+
+server.run()
+'''
+PHASE_LINE = re.compile(r'^(?:PR #\d+: )?(?P<phase>.+) took (?P<seconds>\d+(?:\.\d+)?)s$')
+
+def make_git_repo(path: pathlib.Path, files_count: int, commits_count: int, lines_per_file: int = 200, seed: int = 0) -> tuple[str, str]:
+    """
+    Creates a repository with a base commit on `main` and a feature branch of `commits_count` commits
+    changing `files_count` files: every tenth file is added by the branch, the rest are modified
+
+    Returns:
+        tuple[str, str]: Base and head commit SHAs
+    """
+    rng = random.Random(seed)
+    environment = {
+        **os.environ,
+        'GIT_AUTHOR_NAME': 'Developer', 'GIT_AUTHOR_EMAIL': 'developer@example.com',
+        'GIT_COMMITTER_NAME': 'Developer', 'GIT_COMMITTER_EMAIL': 'developer@example.com',
+    }
+
+    def git(*args: str) -> str:
+        completed = subprocess.run(['git', '-C', str(path), *args], env=environment, check=True, capture_output=True, text=True)
+        return completed.stdout.strip()
+
+    def write(file_name: str, lines: list[str]) -> None:
+        (path / file_name).parent.mkdir(parents=True, exist_ok=True)
+        (path / file_name).write_text(''.join(lines))
+
+    path.mkdir(parents=True, exist_ok=True)
+    git('init', '-q')
+    git('checkout', '-q', '-b', 'main')
+    files = {}
+    for index, change in enumerate(fixtures.make_pr_files(files_count, seed=seed)):
+        files[change['filename']] = [f'value_{index}_{line} = compute({line})\n' for line in range(lines_per_file)]
+        if index % 10:
+            write(change['filename'], files[change['filename']])
+    git('add', '-A')
+    git('commit', '-q', '-m', 'Initial commit')
+    base_sha = git('rev-parse', 'HEAD')
+
+    git('checkout', '-q', '-b', 'feature/e2e')
+    file_names = list(files)
+    for commit in range(commits_count):
+        for file_name in file_names[commit::commits_count]:
+            lines = files[file_name]
+            for line in rng.sample(range(lines_per_file), lines_per_file // 10):
+                lines[line] = f'value_{line} = compute({line}, {rng.choice(fixtures.PACKAGES)!r})\n'
+            write(file_name, lines)
+        git('add', '-A')
+        git('commit', '-q', '-m', f'ABC-{commit + 1} Change part {commit + 1} of the feature')
+    return base_sha, git('rev-parse', 'HEAD')
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, data: any) -> None:
+        body = json.dumps(data).encode()
+        self.server.count(self.command, self.path)
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.command == 'GET' and self.headers.get('If-None-Match') == etag:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if self.command == 'GET':
+            self.send_header('ETag', etag)
+        if getattr(self, 'link', None):
+            self.send_header('Link', self.link)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _paginate(self, items: list, query: dict) -> list:
+        per_page = int(query.get('per_page', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+        last_page = max(1, -(-len(items) // per_page))
+        self.link = None
+        if page < last_page:
+            url = f'{self.server.url}{urllib.parse.urlsplit(self.path).path}?per_page={per_page}'
+            self.link = f'<{url}&page={page + 1}>; rel="next", <{url}&page={last_page}>; rel="last"'
+        return items[(page - 1) * per_page:page * per_page]
+
+    def do_GET(self) -> None:
+        time.sleep(self.server.latency)
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        route = url.path.removeprefix(f'/repos/{REPOSITORY}')
+        if route == f'/pulls/{PR_NUMBER}':
+            return self._send_json(200, self.server.pull_request())
+        if route == f'/pulls/{PR_NUMBER}/files':
+            return self._send_json(200, self._paginate(self.server.files(), query))
+        if route == f'/pulls/{PR_NUMBER}/commits':
+            return self._send_json(200, self._paginate(self.server.commits(), query))
+        if route == '/labels':
+            labels = [{'name': name, 'color': 'ededed', 'url': f'{self.server.repo_url}/labels/{name}'} for name in LABELS]
+            return self._send_json(200, self._paginate(labels, query))
+        if route.startswith('/compare/'):
+            base, _, head = route.removeprefix('/compare/').partition('...')
+            comparison = self.server.compare(base, head)
+            return self._send_json(200 if comparison else 404, comparison or {'message': 'Not Found'})
+        if route == '':
+            return self._send_json(200, self.server.repository())
+        self._send_json(404, {'message': 'Not Found'})
+
+    def do_PATCH(self) -> None:
+        time.sleep(self.server.latency)
+        data = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path == f'/repos/{REPOSITORY}/pulls/{PR_NUMBER}':
+            self.server.body = data.get('body', self.server.body)
+            return self._send_json(200, self.server.pull_request())
+        self._send_json(404, {'message': 'Not Found'})
+
+    def do_POST(self) -> None:
+        time.sleep(self.server.latency)
+        data = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'[]')
+        if self.path == f'/repos/{REPOSITORY}/issues/{PR_NUMBER}/labels':
+            names = data.get('labels', []) if isinstance(data, dict) else data
+            return self._send_json(200, [{'name': name, 'url': f'{self.server.repo_url}/labels/{name}'} for name in names])
+        self._send_json(404, {'message': 'Not Found'})
+
+class FakeGithub(ThreadingHTTPServer):
+    """
+    Fake of the GitHub REST API endpoints used by pr-summary for a single pull request
+    of a local git repository. Files and commits are computed with git once.
+    """
+    daemon_threads = True
+
+    def __init__(self, repo_path: pathlib.Path, base_sha: str, head_sha: str, latency: float):
+        super().__init__(('127.0.0.1', 0), FakeGithubHandler)
+        self.url = f'http://127.0.0.1:{self.server_port}'
+        self.repo_url = f'{self.url}/repos/{REPOSITORY}'
+        self.repo_path = repo_path
+        self.base_sha = base_sha
+        self.head_sha = head_sha
+        self.latency = latency
+        self.body = PR_BODY
+        self.requests = {}
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._diff_provider = common.load_script(common.PR_SUMMARY.parent / 'diff_provider.py')
+        self._files = [self._file(change) for change in self._local_diff().pull_request_changes()]
+        self._commits = self._git_commits(f'{base_sha}..{head_sha}')
+
+    def count(self, method: str, path: str) -> None:
+        route = f'{method} {urllib.parse.urlsplit(path).path}'
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def reset(self, body: str | None) -> None:
+        """Resets the counters, and the PR body unless `body` is None"""
+        if body is not None:
+            self.body = body
+        self.requests = {}
+        self.not_modified = 0
+
+    def _local_diff(self):
+        return self._diff_provider.LocalGitDiffProvider(str(self.repo_path), self.base_sha, self.head_sha)
+
+    @staticmethod
+    def _file(change) -> dict:
+        return {
+            'filename': change.filename,
+            'status': change.status,
+            'additions': change.additions,
+            'deletions': change.deletions,
+            'changes': change.additions + change.deletions,
+            'patch': change.patch,
+        }
+
+    def _git_commits(self, revisions: str) -> list[dict]:
+        completed = subprocess.run(
+            ['git', '-C', str(self.repo_path), 'log', '--reverse', '--format=%H%x00%B%x00', revisions],
+            check=True, capture_output=True, text=True,
+        )
+        fields = completed.stdout.split('\0')
+        return [
+            {'sha': sha.strip(), 'url': f'{self.repo_url}/commits/{sha.strip()}', 'commit': {'message': message.strip()}}
+            for sha, message in zip(fields[0::2], fields[1::2])
+            if sha.strip()
+        ]
+
+    def repository(self) -> dict:
+        return {'name': REPOSITORY.split('/')[1], 'full_name': REPOSITORY, 'url': self.repo_url}
+
+    def pull_request(self) -> dict:
+        return {
+            'number': PR_NUMBER,
+            'state': 'open',
+            'draft': False,
+            'title': 'Stub feature',
+            'body': self.body,
+            'url': f'{self.repo_url}/pulls/{PR_NUMBER}',
+            'issue_url': f'{self.repo_url}/issues/{PR_NUMBER}',
+            'head': {'ref': 'feature/e2e', 'sha': self.head_sha, 'repo': self.repository()},
+            'base': {'ref': 'main', 'sha': self.base_sha, 'repo': self.repository()},
+            'labels': [],
+        }
+
+    def files(self) -> list[dict]:
+        return self._files
+
+    def commits(self) -> list[dict]:
+        return self._commits
+
+    def compare(self, base: str, head: str) -> dict | None:
+        changes = self._diff_provider.LocalGitDiffProvider(str(self.repo_path), base, head).changes_since(base)
+        if changes is None:
+            return None
+        return {'status': 'ahead' if changes else 'identical', 'files': [self._file(change) for change in changes]}
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if not self.path.endswith('/responses'):
+            body = json.dumps({'error': {'message': f'{self.path} is not stubbed', 'type': 'invalid_request_error'}}).encode()
+            self.send_response(404)
+        else:
+            time.sleep(self.server.latency)
+            body = json.dumps(self.server.response(request)).encode()
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class StubModel(ThreadingHTTPServer):
+    """
+    Stub of the OpenAI Responses API, answering every request with `MODEL_OUTPUT` after `latency` seconds
+    """
+    daemon_threads = True
+
+    def __init__(self, latency: float):
+        super().__init__(('127.0.0.1', 0), StubModelHandler)
+        self.url = f'http://127.0.0.1:{self.server_port}/v1'
+        self.latency = latency
+        self.calls = 0
+        self.input_chars = 0
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.input_chars = 0
+
+    def response(self, request: dict) -> dict:
+        input_chars = len(json.dumps(request.get('input', '')))
+        with self._lock:
+            self.calls += 1
+            self.input_chars += input_chars
+            call = self.calls
+        return {
+            'id': f'resp_{call}',
+            'object': 'response',
+            'created_at': int(time.time()),
+            'status': 'completed',
+            'model': request.get('model'),
+            'output': [{
+                'type': 'message',
+                'id': f'msg_{call}',
+                'status': 'completed',
+                'role': 'assistant',
+                'content': [{'type': 'output_text', 'text': MODEL_OUTPUT, 'annotations': []}],
+            }],
+            'parallel_tool_calls': True,
+            'tool_choice': 'auto',
+            'tools': [],
+            'usage': {
+                'input_tokens': input_chars // 4,
+                'input_tokens_details': {'cached_tokens': 0},
+                'output_tokens': len(MODEL_OUTPUT) // 4,
+                'output_tokens_details': {'reasoning_tokens': 0},
+                'total_tokens': (input_chars + len(MODEL_OUTPUT)) // 4,
+            },
+        }
+
+def serve(server: ThreadingHTTPServer) -> ThreadingHTTPServer:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def write_mcp_server_stub(bin_path: pathlib.Path) -> None:
+    bin_path.mkdir(parents=True, exist_ok=True)
+    script = bin_path / 'mcp-server-git'
+    script.write_text(MCP_SERVER_STUB.format(python=sys.executable))
+    script.chmod(0o755)
+
+def parse_phases(log: str) -> dict[str, float]:
+    """
+    Returns durations of the phases logged by the generator, summed up if a phase is logged several times
+    """
+    phases = {}
+    for line in log.splitlines():
+        match = PHASE_LINE.match(line.strip())
+        if match:
+            phases[match['phase']] = phases.get(match['phase'], 0) + float(match['seconds'])
+    return phases
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='Number of runs of the generator')
+    parser.add_argument('--pr-files', type=int, default=100, help='Number of files changed by the PR')
+    parser.add_argument('--pr-commits', type=int, default=5, help='Number of commits of the PR')
+    parser.add_argument('--github-latency', type=float, default=0.05, help='Latency of every GitHub API request, in seconds')
+    parser.add_argument('--model-latency', type=float, default=1.0, help='Latency of every model response, in seconds')
+    parser.add_argument('--diff-source', choices=['auto', 'local', 'github'], default='auto', help='--diff-source of the generator')
+    parser.add_argument('--http-cache', action='store_true', help='Keep GitHub API responses in a cache shared by the runs')
+    parser.add_argument('--keep-body', action='store_true', help="Don't reset the PR body between runs (summary cache, incremental summaries)")
+    parser.add_argument('--real-mcp-server', action='store_true', help='Use the installed mcp-server-git (or uvx) instead of the stub')
+    parser.add_argument('--verbose', action='store_true', help='Print the log of every run')
+    parser.add_argument('--output', type=pathlib.Path, help='Path to write the JSON results to')
+    args, generator_args = parser.parse_known_args()
+    if generator_args[:1] == ['--']:
+        generator_args = generator_args[1:]
+
+    prompt = yaml.safe_load((common.PR_SUMMARY.parent / 'action.yaml').read_text())['inputs']['openai-prompt']['default']
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = pathlib.Path(tmp_dir)
+        repo_path = tmp_path / 'repo'
+        base_sha, head_sha = make_git_repo(repo_path, args.pr_files, args.pr_commits)
+        github = serve(FakeGithub(repo_path, base_sha, head_sha, args.github_latency))
+        model = serve(StubModel(args.model_latency))
+        path = os.environ.get('PATH', '')
+        if not args.real_mcp_server:
+            write_mcp_server_stub(tmp_path / 'bin')
+            path = f'{tmp_path / "bin"}{os.pathsep}{path}'
+        environment = {
+            **os.environ,
+            'PATH': path,
+            'NO_PROXY': '127.0.0.1,localhost',
+            'GITHUB_API_URL': github.url,
+            'GITHUB_TOKEN': 'e2e-github-token',
+            'OPENAI_BASE_URL': model.url,
+            'OPENAI_API_KEY': 'e2e-openai-key',
+            'OPENAI_AGENTS_DISABLE_TRACING': '1',
+            'OPENAI_PROMPT': prompt,
+            'REPO_PATH': str(repo_path),
+            'REPOSITORY': REPOSITORY,
+        }
+        environment.pop('GITHUB_OUTPUT', None)
+        command = [
+            sys.executable, str(common.PR_SUMMARY),
+            '--pr-number', str(PR_NUMBER),
+            '--diff-source', args.diff_source,
+            '--output-file', str(tmp_path / 'ai_output.yaml'),
+        ]
+        if args.http_cache:
+            command += ['--http-cache-dir', str(tmp_path / 'http-cache')]
+        command += generator_args
+
+        try:
+            for run in range(args.runs):
+                github.reset(None if args.keep_body else PR_BODY)
+                model.reset()
+                started = time.perf_counter()
+                completed = subprocess.run(command, env=environment, cwd=repo_path, capture_output=True, text=True)
+                wall = time.perf_counter() - started
+                if args.verbose or completed.returncode:
+                    print(completed.stdout + completed.stderr, file=sys.stderr)
+                if completed.returncode:
+                    sys.exit(f'Run {run + 1} failed with exit code {completed.returncode}')
+                runs.append({
+                    'phases': {**parse_phases(completed.stderr), 'wall': wall},
+                    'githubRequests': sum(github.requests.values()),
+                    'githubNotModified': github.not_modified,
+                    'githubRoutes': github.requests,
+                    'modelCalls': model.calls,
+                    'modelInputChars': model.input_chars,
+                    'bodyUpdated': 'generated by' in github.body,
+                })
+        finally:
+            github.shutdown()
+            model.shutdown()
+
+    phase_names = list(dict.fromkeys(name for run in runs for name in run['phases']))
+    phases = []
+    print(f'{"phase":>50} {"best s":>8} {"median s":>9} {"runs":>5}')
+    for name in phase_names:
+        seconds = [run['phases'][name] for run in runs if name in run['phases']]
+        phases.append({'phase': name, 'seconds': min(seconds), 'medianSeconds': statistics.median(seconds), 'runs': seconds})
+        print(f'{name[:50]:>50} {min(seconds):>8.2f} {statistics.median(seconds):>9.2f} {len(seconds):>5}')
+    print(
+        'per run: ' + ', '.join(
+            f'{run["githubRequests"]} GitHub requests ({run["githubNotModified"]} not modified), {run["modelCalls"]} model calls'
+            for run in runs
+        )
+    )
+
+    if args.output:
+        report = {
+            'commit': suite.git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'createdAt': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'parameters': {**{key: str(value) if isinstance(value, pathlib.Path) else value for key, value in vars(args).items()}, 'generatorArgs': generator_args},
+            'phases': phases,
+            'runs': runs,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    main()
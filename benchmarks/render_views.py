@@ -0,0 +1,57 @@
+"""
+Compares rendering of the vulnerabilities PR comment using precomputed `rows` with the former
+template flattening `files` with `{% set ... append %}`.
+
+    python -m benchmarks.render_views --sizes 10000 50000
+"""
+import argparse
+import io
+import json
+import time
+
+import jinja2
+
+from benchmarks import common, fixtures
+
+# Loop of the vulnerabilities PR comment before `rows` were added by sarif-to-json.py
+LEGACY_LOOP = """
+{%- set vulnerabilitiesFiles = [] %}
+{%- for fileName, files in vulnerabilities.files.items() %}
+  {%- for file in files %}
+    {%- set vulnerabilitiesFiles = vulnerabilitiesFiles.append(file) %}
+  {%- endfor %}
+{%- endfor %}
+{%- for file in vulnerabilitiesFiles %}"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 50_000], help='Result counts to benchmark')
+    args = parser.parse_args()
+
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    source = (common.SECURITY_AUDIT_TEMPLATES / 'pr-comment-vulnerabilities-template.j2').read_text()
+    templates = {
+        'legacy': jinja2.Template(source.replace('{%- for file in vulnerabilities.rows %}', LEGACY_LOOP)),
+        'rows': jinja2.Template(source),
+    }
+    github = {'repo': 'saritasa-nest/example', 'pullRequestBranch': 'feature/example'}
+
+    print(f'{"results":>10} {"template":>8} {"seconds":>8}')
+    for size in args.sizes:
+        sarif = io.StringIO()
+        fixtures.write_trivy_sarif(sarif, size)
+        result = sarif_to_json.convert_trivy_results_to_json(json.loads(sarif.getvalue())['runs'][0])
+        data = {**sarif_to_json.add_render_views(result), 'github': github}
+        # The legacy loop reads findings grouped by files, which `rows` replace
+        vulnerabilities = data['vulnerabilities']
+        legacy_data = {
+            **data,
+            'vulnerabilities': {**vulnerabilities, 'files': sarif_to_json.findings_by_file('vulnerabilities', vulnerabilities)},
+        }
+        for name, template in templates.items():
+            started = time.perf_counter()
+            template.render(legacy_data if name == 'legacy' else data)
+            print(f'{size:>10} {name:>8} {time.perf_counter() - started:>8.2f}')
+
+if __name__ == '__main__':
+    main()
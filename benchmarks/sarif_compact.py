@@ -0,0 +1,34 @@
+"""
+Compares size and parse time of the default and the `--compact` output of `sarif-to-json.py`.
+
+    python -m benchmarks.sarif_compact --sizes 10000 100000
+"""
+import argparse
+import copy
+import io
+import json
+import timeit
+
+from benchmarks import common, fixtures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='Result counts to benchmark')
+    args = parser.parse_args()
+
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    print(f'{"results":>10} {"format":>8} {"size MB":>8} {"parse s":>8}')
+    for size in args.sizes:
+        sarif = io.StringIO()
+        fixtures.write_trivy_sarif(sarif, size)
+        result = sarif_to_json.convert_trivy_results_to_json(json.loads(sarif.getvalue())['runs'][0])
+        outputs = {
+            'default': json.dumps(result, indent=2),
+            'compact': json.dumps(sarif_to_json.compact_results(copy.deepcopy(result)), separators=(',', ':')),
+        }
+        for name, output in outputs.items():
+            seconds = min(timeit.repeat(lambda: json.loads(output), number=1, repeat=5))
+            print(f'{size:>10} {name:>8} {len(output.encode()) / 2**20:>8.2f} {seconds:>8.3f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares wall time and output size of `sarif-to-json.py` without filters and with
+`--only-paths` (files changed by a small PR) and `--min-severity`.
+
+    python -m benchmarks.sarif_filters --sizes 100000 1000000 --changed-files 20
+"""
+import argparse
+import json
+import pathlib
+import random
+import tempfile
+import time
+
+from benchmarks import common, fixtures
+
+def changed_files(sarif_path: pathlib.Path, count: int, seed: int = 0) -> list[str]:
+    """
+    Picks files with scan results to be the files changed by a PR
+    """
+    with open(sarif_path, 'r', encoding='utf-8') as file:
+        results = json.load(file)['runs'][0]['results']
+    file_names = sorted({item['locations'][0]['physicalLocation']['artifactLocation']['uri'] for item in results})
+    return random.Random(seed).sample(file_names, min(count, len(file_names)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000], help='Result counts to benchmark')
+    parser.add_argument('--changed-files', type=int, default=20, help='Number of files changed by the PR')
+    parser.add_argument('--min-severity', default='HIGH', help='Severity floor of the filtered modes')
+    args = parser.parse_args()
+
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    print(f'{"results":>10} {"mode":>16} {"seconds":>8} {"findings":>9} {"output KB":>10}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sarif_path = pathlib.Path(tmp_dir) / 'trivy.sarif'
+        for size in args.sizes:
+            with open(sarif_path, 'w', encoding='utf-8') as file:
+                fixtures.write_trivy_sarif(file, size)
+            paths = sarif_to_json.PathIndex(changed_files(sarif_path, args.changed_files))
+            modes = {
+                'full': None,
+                'paths': sarif_to_json.make_result_filter('trivy', None, paths),
+                'paths+severity': sarif_to_json.make_result_filter('trivy', args.min_severity, paths),
+            }
+            for mode, result_filter in modes.items():
+                started = time.perf_counter()
+                result = sarif_to_json.convert_sarif_file(str(sarif_path), 'trivy', True, 1, result_filter)
+                sarif_to_json.add_render_views(result)
+                output = json.dumps(sarif_to_json.compact_results(result), separators=(',', ':'))
+                seconds = time.perf_counter() - started
+                findings = sum(len(data['rows']) for data in result.values() if isinstance(data, dict) and 'rows' in data)
+                print(f'{size:>10} {mode:>16} {seconds:>8.2f} {findings:>9} {len(output.encode()) / 1024:>10.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Measures scaling of `sarif-to-json.py --jobs` and checks that the output matches the serial conversion.
+
+    python -m benchmarks.sarif_parallel --size 500000 --jobs 1 2 4 8
+"""
+import argparse
+import json
+import os
+import pathlib
+import tempfile
+import time
+
+from benchmarks import common, fixtures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=500_000, help='Number of results in the SARIF file')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts to benchmark')
+    args = parser.parse_args()
+
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    print(f'{args.size} results, {os.cpu_count()} CPUs')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sarif_path = pathlib.Path(tmp_dir) / 'trivy.sarif'
+        with open(sarif_path, 'w', encoding='utf-8') as file:
+            fixtures.write_trivy_sarif(file, args.size)
+
+        serial_output = None
+        for jobs in args.jobs:
+            started = time.perf_counter()
+            result = sarif_to_json.convert_sarif_file(str(sarif_path), 'trivy', jobs=jobs)
+            elapsed = time.perf_counter() - started
+            output = json.dumps(result, indent=2)
+            if serial_output is None:
+                serial_output = output
+            elif output != serial_output:
+                raise SystemExit(f'Output with {jobs} jobs differs from the output with {args.jobs[0]} jobs')
+            print(f'jobs={jobs:<3} {elapsed:8.2f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares peak RSS and wall time of `sarif-to-json.py` with `json.load` and with `--stream`.
+
+Every measurement runs in a separate process, so peak RSS of one mode does not
+leak into the other.
+
+    python -m benchmarks.sarif_streaming --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import pathlib
+import resource
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import common, fixtures
+
+def run_child(args: list[str]) -> None:
+    """
+    Runs sarif-to-json.py in the current process and prints wall time and peak RSS as JSON
+    """
+    sys.argv = [str(common.SARIF_TO_JSON), *args]
+    started = time.perf_counter()
+    runpy.run_path(str(common.SARIF_TO_JSON), run_name='__main__')
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': elapsed, 'peakRssMb': peak_rss / 1024}))
+
+def measure(sarif_path: pathlib.Path, output_path: pathlib.Path, stream: bool) -> dict:
+    args = [str(sarif_path), str(output_path), 'trivy']
+    if stream:
+        args.append('--stream')
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.sarif_streaming', '--child', *args],
+        cwd=common.ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_child(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Result counts to benchmark')
+    args = parser.parse_args()
+
+    print(f'{"results":>10} {"file MB":>8} {"mode":>7} {"seconds":>8} {"peak RSS MB":>12}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = pathlib.Path(tmp_dir)
+        for size in args.sizes:
+            sarif_path = tmp_path / f'trivy-{size}.sarif'
+            with open(sarif_path, 'w', encoding='utf-8') as file:
+                fixtures.write_trivy_sarif(file, size)
+            file_mb = sarif_path.stat().st_size / 2**20
+
+            outputs = {}
+            for stream in (False, True):
+                mode = 'stream' if stream else 'load'
+                outputs[mode] = tmp_path / f'{mode}-{size}.json'
+                stats = measure(sarif_path, outputs[mode], stream)
+                print(f'{size:>10} {file_mb:>8.1f} {mode:>7} {stats["seconds"]:>8.2f} {stats["peakRssMb"]:>12.1f}')
+
+            if outputs['load'].read_bytes() != outputs['stream'].read_bytes():
+                raise SystemExit(f'Outputs differ for {size} results')
+            sarif_path.unlink()
+
+if __name__ == '__main__':
+    main()
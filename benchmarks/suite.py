@@ -0,0 +1,291 @@
+"""
+Times every stage of the action scripts on synthetic fixtures and writes the results as JSON,
+so runs of different commits can be compared.
+
+Pipelines and their stages:
+    sarif-trivy, sarif-gitleaks  parse, convert, views, dump (sarif-to-json.py --compact)
+    render                       load, render (generate-message.py PR comments and Slack message)
+    changelog                    index, splice (changelog.py --entries)
+    prompt                       pack, prompt, cache-key (pr-summary-generator.py prompt assembly)
+
+Every stage is timed `--repeat` times (the best time is reported), then the pipeline runs once
+more under `tracemalloc` to capture the peak memory allocated by every stage. With `--profile-dir`
+the pipeline also runs under cProfile and the stats of every stage are dumped to
+`<pipeline>.<stage>.prof` (see `python -m pstats`).
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --only sarif-trivy prompt --sarif-results 1000000 --profile-dir profiles
+"""
+import argparse
+import contextlib
+import cProfile
+import datetime
+import io
+import json
+import pathlib
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from benchmarks import common, fixtures
+
+REPOSITORY = 'owner/repo'
+GITHUB_DATA = {
+    'repo': 'saritasa-nest/example',
+    'pushBranch': 'refs/pull/1/merge',
+    'pullRequestBranch': 'feature/example',
+    'actor': 'developer',
+    'eventName': 'pull_request',
+    'eventNumber': '1',
+    'commitSha': '0' * 40,
+}
+
+def sarif_pipeline(check_type: str, results_count: int, tmp_path: pathlib.Path) -> tuple[callable, list]:
+    """
+    Returns the setup and the stages of converting a SARIF file the way the action does
+    """
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    sarif_path = tmp_path / f'{check_type}.sarif'
+    output_path = tmp_path / f'{check_type}.json'
+    with open(sarif_path, 'w', encoding='utf-8') as file:
+        if check_type == 'trivy':
+            fixtures.write_trivy_sarif(file, results_count)
+        else:
+            fixtures.write_gitleaks_sarif(file, results_count)
+
+    def parse(path: pathlib.Path) -> dict:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)['runs'][0]
+
+    return lambda: sarif_path, [
+        ('parse', parse),
+        ('convert', sarif_to_json.CONVERTERS[check_type]),
+        ('views', sarif_to_json.add_render_views),
+        ('dump', lambda result: sarif_to_json.write_results(result, str(output_path), compact=True)),
+    ]
+
+def render_pipeline(results_count: int, tmp_path: pathlib.Path) -> tuple[callable, list]:
+    """
+    Returns the setup and the stages of rendering the PR comments and the Slack message from data.json
+    """
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    generate_message = common.load_script(common.GENERATE_MESSAGE)
+    sarif = io.StringIO()
+    fixtures.write_trivy_sarif(sarif, results_count)
+    result = sarif_to_json.convert_trivy_results_to_json(json.loads(sarif.getvalue())['runs'][0])
+    data_path = tmp_path / 'data.json'
+    sarif_to_json.write_results(sarif_to_json.add_render_views({**result, 'github': GITHUB_DATA}), str(data_path), compact=True)
+    environment = generate_message.create_environment(str(common.SECURITY_AUDIT_TEMPLATES))
+
+    def load(path: pathlib.Path) -> dict:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def render(data: dict) -> None:
+        generate_message.render_templates(
+            environment,
+            data,
+            renders=[],
+            paginated_renders=[
+                ('pr-comment-vulnerabilities-template.j2', str(tmp_path / 'pr-comment-vulnerabilities.md')),
+                ('pr-comment-secrets-template.j2', str(tmp_path / 'pr-comment-secrets.md')),
+            ],
+            max_chars=65000,
+            slack_renders=[('slack-message-template.j2', str(tmp_path / 'slack-message.json'))],
+        )
+
+    return lambda: data_path, [('load', load), ('render', render)]
+
+def changelog_pipeline(days_count: int, entries_count: int, tmp_path: pathlib.Path) -> tuple[callable, list]:
+    """
+    Returns the setup and the stages of adding a batch of entries to a multi-year changelog
+    """
+    changelog = common.load_script(common.CHANGELOG)
+    fixture_path = tmp_path / 'CHANGELOG.fixture.md'
+    changelog_path = tmp_path / 'CHANGELOG.md'
+    with open(fixture_path, 'w') as file:
+        last_pr_number = fixtures.write_changelog(file, days_count, repository=REPOSITORY)
+    today = datetime.date.today().isoformat()
+    entries = [
+        {
+            'pr_number': last_pr_number + index + 1,
+            'title': f'Change #{index}',
+            'environment': f'[{fixtures.ENVIRONMENTS[index % len(fixtures.ENVIRONMENTS)]}]',
+            'date': today,
+        }
+        for index in range(entries_count)
+    ]
+
+    def setup() -> pathlib.Path:
+        # The splice changes the file, every run starts with the same changelog
+        shutil.copyfile(fixture_path, changelog_path)
+        return changelog_path
+
+    def index(path: pathlib.Path) -> pathlib.Path:
+        changelog.build_pr_index(str(path), REPOSITORY)
+        return path
+
+    def splice(path: pathlib.Path) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            changelog.changelog_add_entries(str(path), entries, REPOSITORY, create_if_missing=False)
+
+    return setup, [('index', index), ('splice', splice)]
+
+def prompt_pipeline(files_count: int, token_budget: int) -> tuple[callable, list]:
+    """
+    Returns the setup and the stages of assembling the pr-summary prompt from the PR files
+    """
+    pr_summary = common.load_script(common.PR_SUMMARY)
+    prompt = yaml.safe_load((common.PR_SUMMARY.parent / 'action.yaml').read_text())['inputs']['openai-prompt']['default']
+    config = pr_summary.AgentConfig(
+        github_client=None,
+        jira_url='https://example.atlassian.net',
+        model='gpt-5',
+        openai_prompt=prompt,
+        pr_number=1,
+        repo_path='.',
+        repository=REPOSITORY,
+    )
+    agent = pr_summary.PrSummaryAgent(config)
+    changes = [pr_summary.FileChange(**change) for change in fixtures.make_pr_files(files_count)]
+    labels = [f'c/{component}' for component in fixtures.COMPONENTS] + [f'env={env}' for env in fixtures.ENVIRONMENTS]
+
+    def prompt_stage(packed) -> list:
+        agent._build_prompt(changes, packed.text, labels)
+        return changes
+
+    return lambda: changes, [
+        ('pack', lambda files: pr_summary.pack_diff(files, token_budget)),
+        ('prompt', prompt_stage),
+        ('cache-key', lambda files: pr_summary.summary_cache_key(files, config.model, prompt, labels)),
+    ]
+
+def run_stages(setup: callable, stages: list, measure: callable) -> dict[str, any]:
+    """
+    Runs the stages passing the output of every stage to the next one, measured with `measure`
+
+    Args:
+        setup (callable): Function returning the input of the first stage, not measured
+        stages (list): Pairs of stage name and function
+        measure (callable): Context manager factory of the stage name, yielding a dict to store the measurement in
+    Returns:
+        dict: Measurements by stage names
+    """
+    value = setup()
+    measurements = {}
+    for name, function in stages:
+        with measure(name) as measurements[name]:
+            value = function(value)
+    return measurements
+
+@contextlib.contextmanager
+def measure_time(name: str):
+    measurement = {}
+    started = time.perf_counter()
+    yield measurement
+    measurement['seconds'] = time.perf_counter() - started
+
+@contextlib.contextmanager
+def measure_memory(name: str):
+    """
+    Measures the peak of memory allocated by the stage above the memory allocated before it
+    """
+    measurement = {}
+    tracemalloc.reset_peak()
+    allocated, _ = tracemalloc.get_traced_memory()
+    yield measurement
+    _, peak = tracemalloc.get_traced_memory()
+    measurement['peakMemoryMb'] = (peak - allocated) / 2**20
+
+def profile_stages(pipeline: str, profile_dir: pathlib.Path) -> callable:
+    @contextlib.contextmanager
+    def measure_profile(name: str):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        yield {}
+        profiler.disable()
+        profiler.dump_stats(profile_dir / f'{pipeline}.{name}.prof')
+    return measure_profile
+
+def git_commit() -> str | None:
+    completed = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=common.ROOT, capture_output=True, text=True)
+    return completed.stdout.strip() or None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', help='Pipelines to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of every pipeline')
+    parser.add_argument('--sarif-results', type=int, default=100_000, help='Number of results of SARIF fixtures')
+    parser.add_argument('--render-results', type=int, default=20_000, help='Number of results rendered to PR comments')
+    parser.add_argument('--changelog-years', type=int, default=5, help='Age of the changelog in years, a section per day')
+    parser.add_argument('--changelog-entries', type=int, default=100, help='Number of entries added to the changelog')
+    parser.add_argument('--pr-files', type=int, default=500, help='Number of changed files of the PR')
+    parser.add_argument('--token-budget', type=int, default=200_000, help='Token budget of pr-summary code changes')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run')
+    parser.add_argument('--profile-dir', type=pathlib.Path, help='Directory to dump cProfile stats of every stage to')
+    parser.add_argument('--output', type=pathlib.Path, help='Path to write the JSON results to')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = pathlib.Path(tmp_dir)
+        builders = {
+            'sarif-trivy': lambda: sarif_pipeline('trivy', args.sarif_results, tmp_path),
+            'sarif-gitleaks': lambda: sarif_pipeline('gitleaks', args.sarif_results, tmp_path),
+            'render': lambda: render_pipeline(args.render_results, tmp_path),
+            'changelog': lambda: changelog_pipeline(args.changelog_years * 365, args.changelog_entries, tmp_path),
+            'prompt': lambda: prompt_pipeline(args.pr_files, args.token_budget),
+        }
+        unknown = set(args.only or []) - set(builders)
+        if unknown:
+            parser.error(f'unknown pipelines: {", ".join(sorted(unknown))}, expected: {", ".join(builders)}')
+        if args.profile_dir:
+            args.profile_dir.mkdir(parents=True, exist_ok=True)
+
+        results = []
+        print(f'{"pipeline":>15} {"stage":>10} {"best s":>8} {"mean s":>8} {"peak MB":>8}')
+        for pipeline in args.only or builders:
+            setup, stages = builders[pipeline]()
+            runs = [run_stages(setup, stages, measure_time) for _ in range(args.repeat)]
+            memory = {}
+            if not args.no_memory:
+                tracemalloc.start()
+                try:
+                    memory = run_stages(setup, stages, measure_memory)
+                finally:
+                    tracemalloc.stop()
+            if args.profile_dir:
+                run_stages(setup, stages, profile_stages(pipeline, args.profile_dir))
+            for name, _ in stages:
+                seconds = [run[name]['seconds'] for run in runs]
+                stage = {
+                    'pipeline': pipeline,
+                    'stage': name,
+                    'seconds': min(seconds),
+                    'meanSeconds': sum(seconds) / len(seconds),
+                    'runs': seconds,
+                    'peakMemoryMb': memory.get(name, {}).get('peakMemoryMb'),
+                }
+                results.append(stage)
+                peak = f'{stage["peakMemoryMb"]:>8.1f}' if stage['peakMemoryMb'] is not None else f'{"-":>8}'
+                print(f'{pipeline:>15} {name:>10} {stage["seconds"]:>8.3f} {stage["meanSeconds"]:>8.3f} {peak}')
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'createdAt': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'parameters': {key: str(value) if isinstance(value, pathlib.Path) else value for key, value in vars(args).items()},
+            'stages': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares per-result cost of `parse_trivy_message` with the former `str.split` chain.
+
+    python -m benchmarks.trivy_message --number 200000
+"""
+import argparse
+import random
+import timeit
+
+from benchmarks import common, fixtures
+
+def split_chain(text: str) -> dict[str, str]:
+    """
+    Field extraction used by `convert_trivy_results_to_json` before `parse_trivy_message`
+    """
+    return {
+        'Severity': text.split('Severity: ')[1].split('\n')[0].strip(),
+        'Package': text.split('Package: ')[1].split('\n')[0].strip(),
+        'Installed Version': text.split('Installed Version: ')[1].split('\n')[0].strip(),
+        'Fixed Version': text.split('Fixed Version: ')[1].split('\n')[0].strip(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=200_000, help='Number of parsed messages per variant')
+    args = parser.parse_args()
+
+    sarif_to_json = common.load_script(common.SARIF_TO_JSON)
+    rng = random.Random(0)
+    messages = [
+        fixtures.trivy_message(
+            f'CVE-2024-{index:05d}',
+            rng.choice(fixtures.PACKAGES),
+            f'1.{rng.randrange(20)}.0',
+            f'2.{rng.randrange(20)}.1',
+            rng.choice(fixtures.SEVERITIES),
+        )
+        for index in range(1000)
+    ]
+    for message in messages:
+        assert split_chain(message) == sarif_to_json.parse_trivy_message(message)
+
+    for name, parse in (('split chain', split_chain), ('parse_trivy_message', sarif_to_json.parse_trivy_message)):
+        repeats = args.number // len(messages)
+        seconds = min(timeit.repeat(lambda: [parse(message) for message in messages], number=repeats, repeat=5))
+        print(f'{name:>20}: {seconds / (repeats * len(messages)) * 1e9:8.0f} ns/result')
+
+if __name__ == '__main__':
+    main()